@@ -0,0 +1,464 @@
+#!/usr/bin/env python3
+"""
+Columnar aggregation engine for the summary, user-detail and leaderboard payloads
+Loads the Sales, Refunds, Activities, Targets and Levels sheets into NumPy
+arrays keyed by integer rep/cycle codes and answers with grouped reductions
+instead of the per-request row scans done by the Apps Script endpoints.
+
+Run it to benchmark against the row-loop reference in gas_fixtures:
+    python aggregation_engine.py /tmp/workbook --sample 200
+"""
+
+import argparse
+import csv
+import json
+import os
+import random
+import time
+import warnings
+from datetime import date, timedelta
+
+import numpy as np
+
+import gas_fixtures
+from gas_fixtures import SHEETS, month_label
+
+def as_number(value):
+    """NumPy scalar -> int when integral, else float (matches gas_fixtures.coerce_row)"""
+    value = float(value)
+    return int(value) if value.is_integer() else value
+
+def read_csv(path, names):
+    """Columns `names` of a CSV file as an object array, one column per name (missing: '').
+
+    NumPy's C parser reads the file; files it rejects (ragged rows) go through
+    csv.reader instead.
+    """
+    with open(path, newline='', encoding='utf-8') as f:
+        header = next(csv.reader([f.readline()]), [])
+        present = [column for column, name in enumerate(names) if name in header]
+        positions = [header.index(names[column]) for column in present]
+        try:
+            with warnings.catch_warnings():
+                warnings.simplefilter('ignore', UserWarning)  # header-only sheet
+                values = np.loadtxt(f, delimiter=',', quotechar='"', comments=None,
+                                    dtype=object, usecols=positions, ndmin=2)
+        except ValueError:
+            f.seek(0)
+            rows = list(csv.reader(f))[1:]
+            values = np.array([[row[position] if position < len(row) else ''
+                                for position in positions] for row in rows],
+                              dtype=object).reshape(len(rows), len(positions))
+    table = np.full((len(values), len(names)), '', dtype=object)
+    table[:, present] = values
+    return table
+
+def read_columns(source, sheet):
+    """Read one sheet as {column: object array} from a workbook dict or a fixture directory.
+
+    CSV files are parsed straight into columns, skipping the per-row dicts of
+    gas_fixtures.iter_sheet; other sources fall back to it.
+    """
+    names = [name for name, _ in SHEETS[sheet]]
+    csv_path = os.path.join(source, f"{sheet}.csv") if isinstance(source, str) else None
+
+    if csv_path and os.path.exists(csv_path):
+        table = read_csv(csv_path, names)
+        return {name: table[:, column] for column, name in enumerate(names)}
+
+    rows = source[sheet] if isinstance(source, dict) else gas_fixtures.iter_sheet(source, sheet)
+    columns = {name: [] for name in names}
+    for row in rows:
+        for name in names:
+            columns[name].append(row[name])
+    return {name: np.asarray(values, dtype=object) for name, values in columns.items()}
+
+def numeric(values):
+    """Column of numbers (or numeric strings, '' as 0) as float64"""
+    array = np.asarray(values, dtype=object)
+    if array.size and isinstance(array[0], str):
+        return np.fromiter((float(value) if value else 0.0 for value in array), np.float64,
+                           array.size)
+    return array.astype(np.float64)
+
+def factorize(values):
+    """(uniques, codes): sorted distinct strings and the index of each value into them"""
+    return np.unique(np.asarray(values, dtype=object).astype(str), return_inverse=True)
+
+def day_numbers(values):
+    """ISO date strings -> days since the epoch (int64)"""
+    if not len(values):
+        return np.zeros(0, dtype=np.int64)
+    return np.asarray(values, dtype='datetime64[D]').astype(np.int64)
+
+def iso_day(number):
+    return (date(1970, 1, 1) + timedelta(days=int(number))).isoformat()
+
+class GroupIndex:
+    """Rows of a sheet sorted by (rep, cycle, date, id) with CSR offsets per (rep, cycle).
+
+    rows_for(rep, cycle) returns the row numbers of one group in O(1), already
+    in date order, so payload building never scans the sheet.
+    """
+
+    def __init__(self, rep_codes, cycle_codes, days, id_codes, n_cycles, n_groups):
+        keys = rep_codes.astype(np.int64) * n_cycles + cycle_codes
+        self.order = np.lexsort((id_codes, days, keys))
+        counts = np.bincount(keys, minlength=n_groups)
+        self.offsets = np.concatenate(([0], np.cumsum(counts)))
+        self.n_cycles = n_cycles
+
+    def rows_for(self, rep_code, cycle_code):
+        group = rep_code * self.n_cycles + cycle_code
+        return self.order[self.offsets[group]:self.offsets[group + 1]]
+
+class AggregationEngine:
+    """Array-backed tables and precomputed per-(rep, cycle) aggregates"""
+
+    def __init__(self, source=None):
+        """source: workbook dict, fixture directory/JSON path, or None for the guide sample"""
+        if source is None or (isinstance(source, str) and not os.path.isdir(source)):
+            source = gas_fixtures.load_workbook(source)
+        start_time = time.perf_counter()
+
+        reps = read_columns(source, 'Reps')
+        sales = read_columns(source, 'Sales')
+        refunds = read_columns(source, 'Refunds')
+        targets = read_columns(source, 'Targets')
+        activities = read_columns(source, 'Activities')
+        levels = read_columns(source, 'Levels')
+
+        # Integer codes: reps in roster order (plus any only seen in other sheets),
+        # cycles sorted so the highest code is the latest cycle. Each id column is
+        # factorized once; rep_rank is a rep code's place in rep_id string order.
+        sheets = (reps, sales, refunds, targets, activities)
+        rep_ids, first_seen, rep_inverse = np.unique(
+            np.concatenate([sheet['rep_id'] for sheet in sheets]).astype(str),
+            return_index=True, return_inverse=True)
+        self.rep_rank = np.argsort(first_seen, kind='stable')
+        rep_of = np.empty(len(rep_ids), dtype=np.int64)
+        rep_of[self.rep_rank] = np.arange(len(rep_ids))
+        self.rep_ids = rep_ids[self.rep_rank].tolist()
+        self.rep_code = {rep_id: code for code, rep_id in enumerate(self.rep_ids)}
+        cycles, cycle_inverse = factorize(
+            np.concatenate([sheet['cycle_id'] for sheet in sheets[1:]]))
+        self.cycles = cycles.tolist()
+        self.cycle_code = {cycle: code for code, cycle in enumerate(self.cycles)}
+        rep_codes = rep_of[rep_inverse]
+        offsets = np.cumsum([0] + [len(sheet['rep_id']) for sheet in sheets])
+        for sheet, start, end in zip(sheets[1:], offsets[1:-1], offsets[2:]):
+            sheet['rep_code'] = rep_codes[start:end]
+            sheet['cycle_code'] = cycle_inverse[start - offsets[1]:end - offsets[1]]
+        self.names = dict(zip(reps['rep_id'], reps['name']))
+        self.roster = list(zip(reps['rep_id'], reps['name'], reps['email'], reps['status']))
+        # First roster row wins for both name and rep_id lookups, as in gas_fixtures.find_rep
+        self.lookup = {}
+        for rep_id, name, _, _ in reversed(self.roster):
+            self.lookup[name] = rep_id
+            self.lookup[rep_id] = rep_id
+
+        n_reps, n_cycles = len(self.rep_ids), max(1, len(self.cycles))
+        self.n_cycles = n_cycles
+        n_groups = n_reps * n_cycles
+        shape = (n_reps, n_cycles)
+
+        def codes(columns):
+            rep, cycle = columns['rep_code'], columns['cycle_code']
+            return rep, cycle, rep * n_cycles + cycle
+
+        def grouped_sum(keys, weights=None):
+            return np.bincount(keys, weights=weights, minlength=n_groups).reshape(shape)
+
+        # Sales (confirmed rows only count towards achieved)
+        self.sales = {name: np.asarray(sales[name], dtype=object)
+                      for name in ('transaction_id', 'client_name', 'lead_id', 'date')}
+        self.sales['amount'] = numeric(sales['amount'])
+        sale_rep, sale_cycle, sale_key = codes(sales)
+        confirmed = np.asarray(sales['status'], dtype=object) == 'confirmed'
+        sale_days = day_numbers(sales['date'])
+        self.achieved = grouped_sum(sale_key[confirmed], self.sales['amount'][confirmed])
+        self.deals = grouped_sum(sale_key[confirmed])
+        transaction_ids, first_sale, transaction_codes = np.unique(
+            self.sales['transaction_id'].astype(str), return_index=True, return_inverse=True)
+        self.sales_index = GroupIndex(sale_rep[confirmed], sale_cycle[confirmed],
+                                      sale_days[confirmed], transaction_codes[confirmed],
+                                      n_cycles, n_groups)
+        self.sales_rows = np.flatnonzero(confirmed)
+
+        # Refunds, with the original sale's lead_id resolved by binary search
+        self.refunds = {name: np.asarray(refunds[name], dtype=object)
+                        for name in ('refund_id', 'client_name', 'reason', 'date')}
+        self.refunds['amount'] = numeric(refunds['amount'])
+        refund_rep, refund_cycle, refund_key = codes(refunds)
+        refund_days = day_numbers(refunds['date'])
+        self.refunded = grouped_sum(refund_key, self.refunds['amount'])
+        self.cases = grouped_sum(refund_key)
+        self.refunds_index = GroupIndex(refund_rep, refund_cycle, refund_days,
+                                        factorize(self.refunds['refund_id'])[1], n_cycles, n_groups)
+        originals = np.asarray(refunds['original_transaction_id'], dtype=object).astype(str)
+        found = np.searchsorted(transaction_ids, originals)
+        found = np.minimum(found, max(0, len(transaction_ids) - 1))
+        self.refunds['lead_id'] = np.full(len(originals), '', dtype=object)
+        if len(transaction_ids):
+            # First sale row of each transaction_id, as a stable sort would find it
+            matches = transaction_ids[found] == originals
+            self.refunds['lead_id'][matches] = self.sales['lead_id'][first_sale[found[matches]]]
+
+        # Targets: last row wins per (rep, cycle)
+        target_rep, target_cycle, _ = codes(targets)
+        self.targets = np.zeros(shape)
+        self.targets[target_rep, target_cycle] = numeric(targets['target_amount'])
+        self.has_target = np.zeros(shape, dtype=bool)
+        self.has_target[target_rep, target_cycle] = True
+
+        # Activities
+        self.activities = {name: np.asarray(activities[name], dtype=object)
+                           for name in ('activity_id', 'description', 'date')}
+        self.activities['points'] = numeric(activities['points'])
+        self.activity_type = np.asarray(activities['activity_type'], dtype=object)
+        activity_rep, activity_cycle, self.activity_key = codes(activities)
+        self.activity_days = day_numbers(activities['date'])
+        self.points = grouped_sum(self.activity_key, self.activities['points'])
+        self.activity_count = grouped_sum(self.activity_key)
+        self.activities_index = GroupIndex(activity_rep, activity_cycle, self.activity_days,
+                                           factorize(self.activities['activity_id'])[1],
+                                           n_cycles, n_groups)
+
+        # Distinct thresholds, sorted for searchsorted lookups. On a tie the first
+        # level in sheet order wins, and a level's commission comes from the
+        # last row of that name, as in gas_fixtures
+        self.level_mins, first = np.unique(numeric(levels['min_points']), return_index=True)
+        self.level_names = [levels['level_name'][i] for i in first]
+        commission = dict(zip(levels['level_name'], numeric(levels['commission_bonus'])))
+        self.level_commission = np.array([commission[name] for name in self.level_names],
+                                         dtype=np.float64)
+
+        all_days = np.concatenate((sale_days, refund_days, self.activity_days))
+        self.as_of = iso_day(all_days.max()) if all_days.size else date.today().isoformat()
+        self._week = {}
+        self.load_time = time.perf_counter() - start_time
+
+    def level_index(self, points):
+        """Index into the sorted levels for each points value (-1 below every threshold)"""
+        return np.searchsorted(self.level_mins, points, side='right') - 1
+
+    def level_name(self, points):
+        index = int(self.level_index(points))
+        return self.level_names[index] if index >= 0 else None
+
+    def weekly_counts(self, as_of):
+        """(demos, closures) per (rep, cycle) in the 7 days ending at as_of, cached per date"""
+        if as_of not in self._week:
+            end = day_numbers([as_of])[0]
+            in_week = (self.activity_days >= end - 6) & (self.activity_days <= end)
+            counts = []
+            for kind in ('demo', 'closure'):
+                keys = self.activity_key[in_week & (self.activity_type == kind)]
+                counts.append(np.bincount(keys, minlength=self.points.size).reshape(self.points.shape))
+            self._week[as_of] = tuple(counts)
+        return self._week[as_of]
+
+    def users(self):
+        """Same payload as gas_fixtures.build_users"""
+        return [{'rep': name, 'rep_id': rep_id, 'email': email}
+                for rep_id, name, email, status in self.roster if status == 'active']
+
+    def user_detail(self, rep, cycle_id=None, as_of=None):
+        """Same payload as gas_fixtures.build_user_detail, from the precomputed tables"""
+        rep_id = self.lookup.get(rep)
+        if rep_id is None:
+            return []
+        r = self.rep_code[rep_id]
+        if cycle_id is None:
+            cycles = np.flatnonzero(self.has_target[r])
+            cycle_id = self.cycles[cycles[-1]] if cycles.size else None
+        as_of = as_of or self.as_of
+        c = self.cycle_code.get(cycle_id)
+
+        if c is None:
+            target = achieved = refunded = points = 0
+            demos = closures = deals = cases = 0
+            sales_rows = refund_rows = activity_rows = np.zeros(0, dtype=np.int64)
+        else:
+            target = as_number(self.targets[r, c])
+            achieved = as_number(self.achieved[r, c])
+            refunded = as_number(self.refunded[r, c])
+            points = as_number(self.points[r, c])
+            demo_counts, closure_counts = self.weekly_counts(as_of)
+            demos, closures = int(demo_counts[r, c]), int(closure_counts[r, c])
+            deals, cases = int(self.deals[r, c]), int(self.cases[r, c])
+            sales_rows = self.sales_rows[self.sales_index.rows_for(r, c)][::-1]
+            refund_rows = self.refunds_index.rows_for(r, c)[::-1]
+            activity_rows = self.activities_index.rows_for(r, c)[::-1]
+
+        level = self.level_name(points)
+        level_index = int(self.level_index(points))
+        commission = as_number(self.level_commission[level_index]) if level_index >= 0 else 0
+        incentive_total = round((achieved - refunded) * commission / 100)
+        incentive_monthly = round(incentive_total / 2)
+
+        sales, refunds, activities = self.sales, self.refunds, self.activities
+        sales_months = {}
+        for i in sales_rows:
+            month = sales_months.setdefault(month_label(sales['date'][i]),
+                                            {'total': 0, 'deals': 0, 'transactions': []})
+            amount = as_number(sales['amount'][i])
+            month['total'] += amount
+            month['deals'] += 1
+            month['transactions'].append({
+                'transaction_id': sales['transaction_id'][i],
+                'client': sales['client_name'][i],
+                'date': sales['date'][i],
+                'lead_id': sales['lead_id'][i],
+                'amount': amount,
+            })
+
+        refund_months = {}
+        for i in refund_rows:
+            month = refund_months.setdefault(month_label(refunds['date'][i]),
+                                             {'total': 0, 'count': 0, 'transactions': []})
+            amount = as_number(refunds['amount'][i])
+            month['total'] += amount
+            month['count'] += 1
+            month['transactions'].append({
+                'refund_id': refunds['refund_id'][i],
+                'client': refunds['client_name'][i],
+                'date': refunds['date'][i],
+                'lead_id': refunds['lead_id'][i],
+                'reason': refunds['reason'][i],
+                'amount': amount,
+            })
+
+        return [{
+            'rep': self.names[rep_id],
+            'rep_id': rep_id,
+            'cycle_id': cycle_id,
+            'last_computed_at': f"{as_of}T00:00:00Z",
+            'target': target,
+            'achieved': achieved,
+            'refunds': refunded,
+            'remaining': max(0, target - (achieved - refunded)),
+            'points': points,
+            'level': level,
+            'incentiveTotal': incentive_total,
+            'incentiveMonthly': incentive_monthly,
+            'incentiveQuarterly': incentive_total - incentive_monthly,
+            'demos': demos,
+            'closures': closures,
+            'rewards': [f"{activities['date'][i]} | {as_number(activities['points'][i])} pts "
+                        f"{activities['description'][i]}" for i in activity_rows[:10]],
+            'totalArchive': achieved,
+            'totalDeals': deals,
+            'breakdown': [dict(month=name, **values) for name, values in sales_months.items()],
+            'totalRefunds': refunded,
+            'totalCases': cases,
+            'refundBreakdown': [dict(month=name, **values) for name, values in refund_months.items()],
+        }]
+
+    def leaderboard(self, cycle_id, limit=200):
+        """Same payload as gas_fixtures.build_leaderboard: one sort over a points column"""
+        c = self.cycle_code.get(cycle_id)
+        if c is None:
+            return []
+        present = np.flatnonzero(self.activity_count[:, c] > 0)
+        points = self.points[present, c]
+        order = np.lexsort((self.rep_rank[present], -points))[:limit]
+        levels = self.level_index(points[order])
+        return [{
+            'rank': rank,
+            'rep_id': self.rep_ids[present[i]],
+            'rep_name': self.names.get(self.rep_ids[present[i]], self.rep_ids[present[i]]),
+            'points_total': as_number(points[i]),
+            'level': self.level_names[level] if level >= 0 else None,
+        } for rank, (i, level) in enumerate(zip(order, levels), start=1)]
+
+def timed(func, *args):
+    start = time.perf_counter()
+    result = func(*args)
+    return result, time.perf_counter() - start
+
+def tied_levels(levels):
+    """Levels where every second level shares its predecessor's min_points"""
+    return [dict(level, min_points=levels[i - 1]['min_points']) if i % 2 else level
+            for i, level in enumerate(levels)]
+
+def run_benchmark(fixture=None, sample=100, seed=0, limit=200):
+    """Compare the engine with the row-loop reference, also on a copy of the workbook
+    with tied level thresholds; returns a JSON-serializable report
+    """
+    workbook, naive_load = timed(gas_fixtures.load_workbook, fixture)
+    engine, engine_load = timed(AggregationEngine, fixture)
+    rng = random.Random(seed)
+    reps = [row['rep_id'] for row in workbook['Reps']]
+    reps = rng.sample(reps, min(sample, len(reps)))
+
+    naive_detail = engine_detail = 0.0
+    mismatches = []
+    for rep in reps:
+        expected, elapsed = timed(gas_fixtures.build_user_detail, workbook, rep)
+        naive_detail += elapsed
+        actual, elapsed = timed(engine.user_detail, rep)
+        engine_detail += elapsed
+        if json.dumps(expected, sort_keys=True) != json.dumps(actual, sort_keys=True):
+            mismatches.append(rep)
+
+    naive_board = engine_board = 0.0
+    for cycle_id in engine.cycles:
+        expected, elapsed = timed(gas_fixtures.build_leaderboard, workbook, cycle_id, limit)
+        naive_board += elapsed
+        actual, elapsed = timed(engine.leaderboard, cycle_id, limit)
+        engine_board += elapsed
+        if expected != actual:
+            mismatches.append(f"leaderboard:{cycle_id}")
+
+    # The same sheets with tied level thresholds, where the first level in
+    # sheet order has to win
+    tied = dict(workbook, Levels=tied_levels(workbook['Levels']))
+    tied_engine = AggregationEngine(tied)
+    for rep in reps:
+        expected = gas_fixtures.build_user_detail(tied, rep)
+        if json.dumps(expected, sort_keys=True) != json.dumps(tied_engine.user_detail(rep),
+                                                               sort_keys=True):
+            mismatches.append(f"tied-levels:{rep}")
+    for cycle_id in tied_engine.cycles:
+        if gas_fixtures.build_leaderboard(tied, cycle_id, limit) != tied_engine.leaderboard(
+                cycle_id, limit):
+            mismatches.append(f"tied-levels:leaderboard:{cycle_id}")
+
+    per = lambda total, count: round(total / count * 1000, 3) if count else None
+    return {
+        'rows': {sheet: len(rows) for sheet, rows in workbook.items()},
+        'load_s': {'naive': round(naive_load, 3), 'engine': round(engine_load, 3)},
+        'user_detail_ms': {'naive': per(naive_detail, len(reps)),
+                           'engine': per(engine_detail, len(reps)), 'samples': len(reps)},
+        'leaderboard_ms': {'naive': per(naive_board, len(engine.cycles)),
+                           'engine': per(engine_board, len(engine.cycles)),
+                           'cycles': len(engine.cycles)},
+        'mismatches': mismatches,
+    }
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the aggregation engine against row loops")
+    parser.add_argument("fixture", nargs="?", help="Workbook directory or JSON (default: guide sample)")
+    parser.add_argument("--sample", type=int, default=100, help="Reps to compare (default: 100)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--report", help="Write the JSON report to this path")
+    args = parser.parse_args(argv)
+
+    report = run_benchmark(args.fixture, args.sample, args.seed)
+    print(json.dumps(report, indent=2))
+    for name in ('user_detail_ms', 'leaderboard_ms'):
+        naive, engine = report[name]['naive'], report[name]['engine']
+        if naive and engine:
+            print(f"{name}: {naive / engine:.0f}x faster")
+    if args.report:
+        with open(args.report, 'w') as f:
+            json.dump(report, f, indent=2)
+    if report['mismatches']:
+        print(f"❌ {len(report['mismatches'])} payloads differ from the row-loop reference")
+        return 1
+    print("✅ Engine payloads match the row-loop reference")
+    return 0
+
+if __name__ == "__main__":
+    exit(main())
@@ -1,13 +1,12 @@
 "use client";
 
-import { useEffect, useState } from "react";
+import { useEffect, useMemo } from "react";
 import { useDispatch, useSelector } from "react-redux";
 
 import { useSession } from "next-auth/react";
 import { useRouter } from "next/navigation";
 
 import { ArrowLeft, ExternalLink, Calendar } from "lucide-react";
-import { useQuery } from "@tanstack/react-query";
 import { formatCurrency } from "@/lib/utils";
 
 import { Card, CardContent, CardHeader, CardTitle } from "@/components/ui/card";
@@ -15,6 +14,7 @@ import { Button } from "@/components/ui/button";
 import { Badge } from "@/components/ui/badge";
 
 import useGetUsers from "../hooks/useGetUsers";
+import useLogs from "../hooks/useLogs";
 import { setUsers } from "../store/dashboard/UsersSlice";
 
 export default function AchievedLogsPage() {
@@ -22,8 +22,6 @@ export default function AchievedLogsPage() {
 
   const { data: session, status } = useSession();
 
-  const [archiveLogs, setArchiveLogs] = useState({});
-
   const dispatch = useDispatch();
   const router = useRouter();
 
@@ -33,18 +31,23 @@ export default function AchievedLogsPage() {
     (r) => r?.email?.toLowerCase().trim() === session?.user?.email
   );
 
-  const { data: userInfo, isLoading: isUserDetailLoading } = useQuery({
-    queryKey: ["user"],
-    queryFn: async () => {
-      const response = await fetch(
-        `/api/user?rep=${encodeURIComponent(match.rep)}`
-      );
-      if (!response.ok) throw new Error("Failed to fetch user details");
-      return response.json();
-    },
-    enabled: !!session,
-    staleTime: 15 * 60 * 1000,
-  });
+  const {
+    items: transactions,
+    summary,
+    isLoading: isLogsLoading,
+    hasNextPage,
+    isFetchingNextPage,
+    fetchNextPage,
+  } = useLogs(match?.rep, "sales");
+
+  // Loaded transactions per month; older months fill in as pages load
+  const transactionsByMonth = useMemo(() => {
+    const byMonth = {};
+    transactions.forEach((transaction) => {
+      (byMonth[transaction.month] ||= []).push(transaction);
+    });
+    return byMonth;
+  }, [transactions]);
 
   useEffect(() => {
     if (usersData) {
@@ -52,19 +55,13 @@ export default function AchievedLogsPage() {
     }
   }, [usersData]);
 
-  useEffect(() => {
-    if (userInfo) {
-      setArchiveLogs(userInfo[0] || {});
-    }
-  }, [userInfo]);
-
   useEffect(() => {
     if (status === "unauthenticated") {
       router.push("/");
     }
   }, [status]);
 
-  if (status === "loading" || isLoading || isUserDetailLoading) {
+  if (status === "loading" || isLoading || isLogsLoading) {
     return (
       <div className="min-h-screen flex items-center justify-center">
         <div className="animate-spin rounded-full h-8 w-8 border-b-2 border-primary"></div>
@@ -92,20 +89,13 @@ export default function AchievedLogsPage() {
             <div className="grid grid-cols-2 gap-4 text-center">
               <div>
                 <p className="text-2xl font-bold text-green-700">
-                  {formatCurrency(
-                    // archiveLogs.reduce((sum, log) => sum + log.total, 0)
-                    archiveLogs?.totalArchive || 0
-                  )}
+                  {formatCurrency(summary?.amount || 0)}
                 </p>
                 <p className="text-sm text-green-600">Total Achieved</p>
               </div>
               <div>
                 <p className="text-2xl font-bold text-green-700">
-                  {/* {archiveLogs.reduce((sum, log) => sum + log.deals, 0)} */}
-                  {formatCurrency(
-                    // archiveLogs.reduce((sum, log) => sum + log.total, 0)
-                    archiveLogs?.totalDeals || 0
-                  )}
+                  {summary?.count || 0}
                 </p>
                 <p className="text-sm text-green-600">Total Deals</p>
               </div>
@@ -120,8 +110,8 @@ export default function AchievedLogsPage() {
             Monthly Breakdown
           </h2>
 
-          {archiveLogs?.breakdown
-            ? archiveLogs.breakdown.map((log, index) => (
+          {summary?.months
+            ? summary.months.map((log, index) => (
                 <div key={index} className="space-y-2">
                   <Card className="hover:shadow-md transition-shadow">
                     <CardContent className="p-4">
@@ -138,7 +128,7 @@ export default function AchievedLogsPage() {
                               </strong>
                             </span>
                             <Badge variant="outline">
-                              {log.deals || 0} deals
+                              {log.count || 0} deals
                             </Badge>
                           </div>
                         </div>
@@ -170,10 +160,10 @@ export default function AchievedLogsPage() {
                           Transaction Details - {log.month || 0}
                         </h4>
                         <div className="space-y-2">
-                          {log.transactions &&
-                            log.transactions?.map((transaction, txIndex) => (
+                          {transactionsByMonth[log.month]?.map(
+                            (transaction) => (
                               <div
-                                key={txIndex}
+                                key={transaction.id}
                                 className="flex items-center justify-between p-3 bg-green-50 rounded-lg"
                               >
                                 <div>
@@ -191,7 +181,23 @@ export default function AchievedLogsPage() {
                                   </p>
                                 </div>
                               </div>
-                            ))}
+                            )
+                          )}
+                          {hasNextPage &&
+                            (transactionsByMonth[log.month]?.length || 0) <
+                              log.count && (
+                              <Button
+                                variant="outline"
+                                size="sm"
+                                disabled={isFetchingNextPage}
+                                onClick={() => fetchNextPage()}
+                                className="w-full"
+                              >
+                                {isFetchingNextPage
+                                  ? "Loading..."
+                                  : "Load more transactions"}
+                              </Button>
+                            )}
                         </div>
                       </CardContent>
                     </Card>
@@ -1,9 +1,53 @@
 import { NextRequest, NextResponse } from "next/server";
-import { getServerSession } from "next-auth/next";
+import { sessionCache, verifySession } from "@/lib/auth";
 
 import { FETCH_USER_DETAIL, FETCH_USERS } from "@/app/api-main-file/APIUrl";
+import {
+  batchCache,
+  gasCache,
+  GAS_CACHE_TTL,
+  GAS_CACHE_STALE,
+  envInt,
+} from "@/lib/gas-cache";
+import { CircuitOpenError, gasClient } from "@/lib/gas-client";
+import { ServerTiming } from "@/lib/server-timing";
+import { mapWithConcurrency, withTimeout } from "@/lib/concurrency";
+import {
+  LOG_TYPES,
+  decodeCursor,
+  flattenLogs,
+  ndjsonStream,
+  paginate,
+  summarizeLogs,
+} from "@/lib/logs";
+import { diffDetail, versionHistory } from "@/lib/delta-sync";
+import {
+  LEADERBOARD_SNAPSHOT_DIR,
+  readLeaderboardSnapshot,
+} from "@/lib/leaderboard";
 
-export async function fetchGASApi(paramUrl) {
+// Page sizes for /api/logs
+const LOGS_DEFAULT_LIMIT = 50;
+const LOGS_MAX_LIMIT = 500;
+
+// Default and maximum rows for /api/leaderboard
+const LEADERBOARD_DEFAULT_LIMIT = 200;
+const LEADERBOARD_MAX_LIMIT = 1000;
+
+// Batch rep-detail fan-out limits
+const BATCH_MAX_REPS = envInt("GAS_BATCH_MAX_REPS", 1000);
+const BATCH_CONCURRENCY = Math.max(1, envInt("GAS_BATCH_CONCURRENCY", 8));
+const BATCH_TIMEOUT_MS = envInt("GAS_BATCH_TIMEOUT_MS", 10000);
+
+// Client endpoint (deadline, hedging and breaker state) of a GAS URL
+function endpointOf(paramUrl) {
+  return paramUrl.startsWith(FETCH_USERS) ? "users" : "user";
+}
+
+// Parsed JSON from Apps Script through gasClient: per-endpoint deadline,
+// hedged second request and circuit breaker. Throws UpstreamError (or
+// CircuitOpenError) instead of returning bad data.
+export async function fetchGASApi(paramUrl, timing) {
   if (!paramUrl) throw new Error("GAS_BASE_URL is not set");
 
   if (paramUrl.includes("/a/macros/")) {
@@ -12,37 +56,406 @@ export async function fetchGASApi(paramUrl) {
     );
   }
 
+  // upstream is the wait for the winning response's headers; reading and
+  // parsing its body is reported separately as parse
+  const start = performance.now();
   try {
-    const response = await fetch(paramUrl);
-    const json = await response.json();
+    const { data, parseMs, hedged, winner } = await gasClient.fetchJSON(
+      paramUrl,
+      endpointOf(paramUrl)
+    );
+    if (timing) {
+      timing.add("upstream", performance.now() - start - parseMs);
+      timing.add("parse", parseMs);
+      if (hedged) timing.add("hedge", undefined, winner ? "won" : "lost");
+    }
+    return data;
+  } catch (error) {
+    timing?.add("upstream", performance.now() - start);
+    throw error;
+  }
+}
 
-    return json;
+// fetchGASApi behind a TTL/LRU cache (gasCache unless given), keyed by the full GAS URL
+// (query included). Failed fetches are not cached; when one fails the last
+// good copy, however old, is returned as FALLBACK, and only without one is
+// the error returned (cacheStatus ERROR). Within `stale` ms past the TTL the
+// cached copy is returned at once while a background fetch refreshes it.
+// Only the request that triggers the fetch records upstream timings;
+// coalesced requests record their wait as upstream-wait.
+export async function cachedGASApi(
+  paramUrl,
+  ttl,
+  timing,
+  stale = 0,
+  cache = gasCache
+) {
+  const start = performance.now();
+  let result;
+  try {
+    const entry = await cache.getOrLoad(
+      paramUrl,
+      ttl,
+      () => fetchGASApi(paramUrl, timing),
+      stale
+    );
+    result = { ...entry, data: entry.value, cacheStatus: entry.status };
   } catch (error) {
-    return error;
+    const entry =
+      cache.lastGood(paramUrl) ||
+      (cache !== gasCache ? gasCache.lastGood(paramUrl) : undefined);
+    result = entry
+      ? { ...entry, data: entry.value, cacheStatus: "FALLBACK", error }
+      : { data: error, cacheStatus: "ERROR" };
+  }
+
+  if (timing) {
+    if (result.cacheStatus === "COALESCED") {
+      timing.add("upstream-wait", performance.now() - start);
+    }
+    timing.add("cache", undefined, result.cacheStatus);
+  }
+  return result;
+}
+
+// 503 with Retry-After while the circuit is open, 502 for other failures
+function upstreamErrorResponse(error) {
+  if (error instanceof CircuitOpenError) {
+    return NextResponse.json(
+      { error: "Upstream unavailable", details: error.message },
+      {
+        status: 503,
+        headers: { "Retry-After": String(Math.ceil(error.retryInMs / 1000)) },
+      }
+    );
+  }
+  return NextResponse.json(
+    { error: "Upstream error", details: error.message },
+    { status: 502 }
+  );
+}
+
+// True when an If-None-Match header lists etag (or is "*")
+function etagMatches(header, etag) {
+  if (!header || !etag) return false;
+  return header
+    .split(",")
+    .map((tag) => tag.trim().replace(/^W\//, ""))
+    .some((tag) => tag === "*" || tag === etag);
+}
+
+// Browsers may reuse the body until the cache entry expires, then keep
+// showing it for the stale window while revalidating with If-None-Match
+function cacheControl({ expiresAt, staleUntil }) {
+  const now = Date.now();
+  const maxAge = Math.max(0, Math.floor((expiresAt - now) / 1000));
+  const stale = Math.max(0, Math.floor((staleUntil - Math.max(expiresAt, now)) / 1000));
+  return `private, max-age=${maxAge}, stale-while-revalidate=${stale}`;
+}
+
+// JSON response for a cachedGASApi result, with ETag and Cache-Control for
+// cached payloads and a bodyless 304 when the client already has this version
+function cachedResponse(request, result, timing) {
+  const { data, cacheStatus, body, etag } = result;
+  if (cacheStatus === "ERROR") {
+    const response = upstreamErrorResponse(data);
+    response.headers.set("X-Cache", cacheStatus);
+    return response;
+  }
+
+  const headers = {
+    "X-Cache": cacheStatus,
+    ETag: etag,
+    "Cache-Control": cacheControl(result),
+    Vary: "Cookie",
+  };
+  if (etagMatches(request.headers.get("if-none-match"), etag)) {
+    timing.add("revalidate", undefined, "304");
+    return new NextResponse(null, { status: 304, headers });
+  }
+  return timing.timeSync("build", () =>
+    new NextResponse(body, {
+      headers: { ...headers, "Content-Type": "application/json" },
+    })
+  );
+}
+
+// One URL (and so one cache key) per rep for single and batch lookups
+function userDetailUrl(rep) {
+  return `${FETCH_USER_DETAIL}?rep=${encodeURIComponent(rep)}`;
+}
+
+// Fetch FETCH_USER_DETAIL for many reps with bounded concurrency and a
+// per-rep timeout. Failures are reported per rep instead of failing the batch.
+async function fetchUserDetails(reps, timing) {
+  const unique = [...new Set(reps.map((rep) => rep.trim()).filter(Boolean))];
+  if (unique.length > BATCH_MAX_REPS) {
+    return NextResponse.json(
+      {
+        error: `Too many reps: ${unique.length} (max ${BATCH_MAX_REPS})`,
+        maxReps: BATCH_MAX_REPS,
+      },
+      { status: 400 }
+    );
+  }
+
+  const settled = await timing.time("upstream-batch", () =>
+    mapWithConcurrency(unique, BATCH_CONCURRENCY, async (rep) => {
+      // Fresh gasCache entries are used as they are; what the batch loads
+      // goes to batchCache, so a large batch does not flush gasCache
+      const url = userDetailUrl(rep);
+      const shared = gasCache.peek(url);
+      if (shared) return { data: shared.value, cacheStatus: "HIT" };
+
+      const { data, cacheStatus } = await withTimeout(
+        cachedGASApi(
+          url,
+          GAS_CACHE_TTL.user,
+          undefined,
+          GAS_CACHE_STALE.user,
+          batchCache
+        ),
+        BATCH_TIMEOUT_MS
+      );
+      if (cacheStatus === "ERROR") throw data;
+      return { data, cacheStatus };
+    })
+  );
+
+  const results = {};
+  const errors = {};
+  const cache = {};
+  settled.forEach((outcome, index) => {
+    const rep = unique[index];
+    if (outcome.status === "fulfilled") {
+      results[rep] = outcome.value.data;
+      cache[outcome.value.cacheStatus] = (cache[outcome.value.cacheStatus] || 0) + 1;
+    } else {
+      errors[rep] = outcome.reason?.message || String(outcome.reason);
+    }
+  });
+  timing.add("cache", undefined, Object.entries(cache).map(([k, v]) => `${k}:${v}`).join(" "));
+
+  return timing.timeSync("build", () =>
+    NextResponse.json({
+      results,
+      errors,
+      meta: {
+        requested: unique.length,
+        succeeded: Object.keys(results).length,
+        failed: Object.keys(errors).length,
+      },
+    })
+  );
+}
+
+// /api/logs?rep=&type=sales|refunds|activity&limit=&cursor= returns one page
+// of a rep's log, newest first, and with the first page the log's totals;
+// /api/logs/export streams the whole log as NDJSON
+async function fetchLogs(searchParams, timing, { stream = false } = {}) {
+  const type = searchParams.get("type") || "sales";
+  if (!LOG_TYPES.includes(type)) {
+    return NextResponse.json(
+      { error: `Unknown log type: ${type}. Use one of ${LOG_TYPES.join(", ")}` },
+      { status: 400 }
+    );
+  }
+
+  const cursorParam = searchParams.get("cursor");
+  const cursor = cursorParam ? decodeCursor(cursorParam) : null;
+  if (cursorParam && !cursor) {
+    return NextResponse.json({ error: "Invalid cursor" }, { status: 400 });
+  }
+
+  const { data, cacheStatus } = await cachedGASApi(
+    userDetailUrl(searchParams.get("rep")),
+    GAS_CACHE_TTL.user,
+    timing,
+    GAS_CACHE_STALE.user
+  );
+  if (cacheStatus === "ERROR") return upstreamErrorResponse(data);
+
+  const items = timing.timeSync("paginate", () => flattenLogs(data, type));
+  if (stream) {
+    return new Response(ndjsonStream(items), {
+      headers: { "Content-Type": "application/x-ndjson", "X-Cache": cacheStatus },
+    });
+  }
+
+  const requested = parseInt(searchParams.get("limit"), 10);
+  const limit = Math.min(
+    Number.isFinite(requested) && requested > 0 ? requested : LOGS_DEFAULT_LIMIT,
+    LOGS_MAX_LIMIT
+  );
+  return timing.timeSync("build", () => {
+    const page = paginate(items, cursor, limit);
+    if (!cursor) page.summary = summarizeLogs(items);
+    return NextResponse.json(page, { headers: { "X-Cache": cacheStatus } });
+  });
+}
+
+// /api/sync?rep=&since=<version> returns what changed in a rep's detail
+// document since the version (ETag) the client holds: a delta when that
+// version is still in the history and the delta is smaller than the
+// document, otherwise the full snapshot
+async function fetchSync(searchParams, timing) {
+  const url = userDetailUrl(searchParams.get("rep"));
+  const result = await cachedGASApi(
+    url,
+    GAS_CACHE_TTL.user,
+    timing,
+    GAS_CACHE_STALE.user
+  );
+  if (result.cacheStatus === "ERROR") return upstreamErrorResponse(result.data);
+
+  const since = searchParams.get("since");
+  const headers = { "X-Cache": result.cacheStatus, ETag: result.etag };
+  const sync = { version: result.etag, since, watermark: result.storedAt };
+  if (since === result.etag) {
+    return NextResponse.json({ ...sync, mode: "unchanged" }, { headers });
+  }
+
+  const current = versionHistory.record(url, result.etag, result.value, result.storedAt);
+  const base = since && current && versionHistory.find(url, since);
+  if (base) {
+    const delta = timing.timeSync("diff", () => diffDetail(base.state, current.state));
+    const body = JSON.stringify({ ...sync, mode: "delta", delta });
+    if (body.length < result.body.length) {
+      return new NextResponse(body, {
+        headers: { ...headers, "Content-Type": "application/json" },
+      });
+    }
+  }
+
+  return timing.timeSync("build", () =>
+    new NextResponse(
+      `{"version":${JSON.stringify(result.etag)},"since":${JSON.stringify(since)},` +
+        `"watermark":${result.storedAt},"mode":"snapshot","document":${result.body}}`,
+      { headers: { ...headers, "Content-Type": "application/json" } }
+    )
+  );
+}
+
+// /api/leaderboard?cycle_id=2025Q3&limit=200 serves the ranked reps from the
+// latest materialized snapshot (see leaderboard_snapshot.py); without
+// cycle_id the most recent cycle is used
+async function fetchLeaderboard(searchParams, timing) {
+  if (!LEADERBOARD_SNAPSHOT_DIR) {
+    return NextResponse.json(
+      { error: "LEADERBOARD_SNAPSHOT_DIR is not set" },
+      { status: 503 }
+    );
+  }
+
+  const snapshot = await timing.time("snapshot", () =>
+    readLeaderboardSnapshot(searchParams.get("cycle_id"))
+  );
+  if (!snapshot) {
+    return NextResponse.json(
+      { error: "No leaderboard snapshot for this cycle" },
+      { status: 404 }
+    );
+  }
+
+  const requested = parseInt(searchParams.get("limit"), 10);
+  const limit = Math.min(
+    Number.isFinite(requested) && requested > 0 ? requested : LEADERBOARD_DEFAULT_LIMIT,
+    LEADERBOARD_MAX_LIMIT
+  );
+  return timing.timeSync("build", () =>
+    NextResponse.json(snapshot.leaderboard.slice(0, limit), {
+      headers: {
+        "X-Snapshot-Cycle": snapshot.cycle_id,
+        "X-Snapshot-Version": String(snapshot.version),
+        "X-Snapshot-Generated-At": snapshot.generated_at,
+      },
+    })
+  );
+}
+
+// Error response when the request has no valid session or its domain is not
+// allowed, else undefined. Verification is cached per token (lib/auth.js).
+async function authorize(request, timing) {
+  const start = performance.now();
+  const { session, status } = await verifySession(request);
+  timing.add("auth", performance.now() - start, status);
+  if (!session) {
+    return NextResponse.json({ error: "Unauthorized" }, { status: 401 });
+  }
+  if (!session.allowed) {
+    return NextResponse.json({ error: "Forbidden" }, { status: 403 });
   }
 }
 
 export async function GET(request) {
+  const timing = new ServerTiming();
+  const response = await handleGET(request, timing);
+  return timing.apply(response);
+}
+
+async function handleGET(request, timing) {
   try {
     const { pathname, searchParams } = new URL(request.url);
     const pathSegments = pathname.split("/").filter(Boolean);
     const endpoint = pathSegments[pathSegments.length - 1];
 
-    const session = await getServerSession();
-    if (!session?.user) {
-      return NextResponse.json({ error: "Unauthorized" }, { status: 401 });
-    }
-
-    const email = (session.user.email || "").trim().toLowerCase();
+    const denied = await authorize(request, timing);
+    if (denied) return denied;
 
     switch (endpoint) {
       case "users":
-        const users = await fetchGASApi(FETCH_USERS);
-        return NextResponse.json(users);
+        const users = await cachedGASApi(
+          FETCH_USERS,
+          GAS_CACHE_TTL.users,
+          timing,
+          GAS_CACHE_STALE.users
+        );
+        return cachedResponse(request, users, timing);
       case "user":
         const rep = searchParams.get("rep");
-        const userDetail = await fetchGASApi(`${FETCH_USER_DETAIL}?rep=${rep}`);
-        return NextResponse.json(userDetail);
+        const userDetail = await cachedGASApi(
+          userDetailUrl(rep),
+          GAS_CACHE_TTL.user,
+          timing,
+          GAS_CACHE_STALE.user
+        );
+        if (userDetail.cacheStatus !== "ERROR") {
+          // Let clients holding this copy delta-sync from it
+          versionHistory.record(
+            userDetailUrl(rep),
+            userDetail.etag,
+            userDetail.value,
+            userDetail.storedAt
+          );
+        }
+        return cachedResponse(request, userDetail, timing);
+      case "detail":
+        // /api/users/detail?rep=a&rep=b
+        return fetchUserDetails(searchParams.getAll("rep"), timing);
+      case "logs":
+        return fetchLogs(searchParams, timing);
+      case "export":
+        // /api/logs/export
+        if (pathSegments[pathSegments.length - 2] === "logs") {
+          return fetchLogs(searchParams, timing, { stream: true });
+        }
+        return NextResponse.json(
+          { error: "Endpoint not found" },
+          { status: 404 }
+        );
+      case "sync":
+        return fetchSync(searchParams, timing);
+      case "leaderboard":
+        return fetchLeaderboard(searchParams, timing);
+      case "cache-stats":
+        return NextResponse.json({
+          ...gasCache.snapshot(),
+          batch: batchCache.snapshot(),
+        });
+      case "upstream-stats":
+        return NextResponse.json(gasClient.snapshot());
+      case "auth-stats":
+        return NextResponse.json(sessionCache.snapshot());
 
       default:
         return NextResponse.json(
@@ -60,7 +473,37 @@ export async function GET(request) {
 }
 
 export async function POST(request) {
-  return NextResponse.json({ error: "Method not allowed" }, { status: 405 });
+  const timing = new ServerTiming();
+  const response = await handlePOST(request, timing);
+  return timing.apply(response);
+}
+
+async function handlePOST(request, timing) {
+  const { pathname } = new URL(request.url);
+  if (!pathname.endsWith("/users/detail")) {
+    return NextResponse.json({ error: "Method not allowed" }, { status: 405 });
+  }
+
+  try {
+    const denied = await authorize(request, timing);
+    if (denied) return denied;
+
+    // Body: { "reps": ["a", "b", ...] }, for batches too long for a query string
+    const body = await request.json().catch(() => null);
+    if (!Array.isArray(body?.reps)) {
+      return NextResponse.json(
+        { error: "Expected a JSON body with a reps array" },
+        { status: 400 }
+      );
+    }
+    return fetchUserDetails(body.reps.map(String), timing);
+  } catch (error) {
+    console.error("API Error:", error);
+    return NextResponse.json(
+      { error: "Internal Server Error", details: error.message },
+      { status: 500 }
+    );
+  }
 }
 
 export async function PUT(request) {
@@ -1,5 +1,6 @@
 import NextAuth from "next-auth";
 import GoogleProvider from "next-auth/providers/google";
+import { allowedDomains, isAllowedEmail } from "@/lib/auth";
 
 const handler = NextAuth({
   providers: [
@@ -14,17 +15,9 @@ const handler = NextAuth({
       // Allow multiple Google Workspace domains
       if (account?.provider === "google") {
         const email = user.email || "";
-        const allowedDomains =
-          process.env.ALLOWED_GOOGLE_WORKSPACE_DOMAIN?.split(",").map((d) =>
-            d.trim()
-          ) || ["cronberry.com"];
 
-        // Check if email domain is in allowed list
-        const isAllowed = allowedDomains.some((domain) =>
-          email.endsWith(`@${domain}`)
-        );
-
-        if (!isAllowed) {
+        // Check if email domain is in allowed list (parsed once in lib/auth.js)
+        if (!isAllowedEmail(email)) {
           console.log(
             `Access denied for email: ${email}. Allowed domains: ${allowedDomains.join(
               ", "
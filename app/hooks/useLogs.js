@@ -0,0 +1,39 @@
+import { useInfiniteQuery } from "@tanstack/react-query";
+
+const LOGS_PAGE_SIZE = 50;
+
+// One of a rep's logs (sales, refunds or activity) from /api/logs, newest
+// first, a page at a time. The first page carries the log's totals.
+const useLogs = (rep, type) => {
+  const { data, isLoading, hasNextPage, isFetchingNextPage, fetchNextPage } =
+    useInfiniteQuery({
+      queryKey: ["logs", rep, type],
+      queryFn: async ({ pageParam }) => {
+        const params = new URLSearchParams({
+          rep,
+          type,
+          limit: String(LOGS_PAGE_SIZE),
+        });
+        if (pageParam) params.set("cursor", pageParam);
+        const response = await fetch(`/api/logs?${params}`);
+        if (!response.ok) throw new Error(`Failed to fetch ${type} logs`);
+        return response.json();
+      },
+      initialPageParam: null,
+      getNextPageParam: (lastPage) => lastPage.nextCursor,
+      enabled: !!rep,
+      staleTime: 15 * 60 * 1000,
+    });
+
+  const pages = data?.pages || [];
+  return {
+    items: pages.flatMap((page) => page.items),
+    summary: pages[0]?.summary,
+    isLoading,
+    hasNextPage,
+    isFetchingNextPage,
+    fetchNextPage,
+  };
+};
+
+export default useLogs;
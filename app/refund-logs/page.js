@@ -1,10 +1,8 @@
 "use client";
 
-import { useEffect, useState } from "react";
+import { useEffect, useMemo } from "react";
 import { useDispatch, useSelector } from "react-redux";
 
-import { useQuery } from "@tanstack/react-query";
-
 import { useSession } from "next-auth/react";
 import { useRouter } from "next/navigation";
 
@@ -16,6 +14,7 @@ import { ArrowLeft, ExternalLink, Calendar, AlertTriangle } from "lucide-react";
 
 import { formatCurrency } from "@/lib/utils";
 import useGetUsers from "../hooks/useGetUsers";
+import useLogs from "../hooks/useLogs";
 import { setUsers } from "../store/dashboard/UsersSlice";
 
 export default function RefundLogsPage() {
@@ -23,8 +22,6 @@ export default function RefundLogsPage() {
 
   const { data: session, status } = useSession();
 
-  const [refundLogs, setRefundLogs] = useState({});
-
   const dispatch = useDispatch();
   const router = useRouter();
 
@@ -34,18 +31,23 @@ export default function RefundLogsPage() {
     (r) => r?.email?.toLowerCase().trim() === session?.user?.email
   );
 
-  const { data: userInfo, isLoading: isUserDetailLoading } = useQuery({
-    queryKey: ["user"],
-    queryFn: async () => {
-      const response = await fetch(
-        `/api/user?rep=${encodeURIComponent(match.rep)}`
-      );
-      if (!response.ok) throw new Error("Failed to fetch user details");
-      return response.json();
-    },
-    enabled: !!session,
-    staleTime: 15 * 60 * 1000,
-  });
+  const {
+    items: refunds,
+    summary,
+    isLoading: isLogsLoading,
+    hasNextPage,
+    isFetchingNextPage,
+    fetchNextPage,
+  } = useLogs(match?.rep, "refunds");
+
+  // Loaded refunds per month; older months fill in as pages load
+  const refundsByMonth = useMemo(() => {
+    const byMonth = {};
+    refunds.forEach((refund) => {
+      (byMonth[refund.month] ||= []).push(refund);
+    });
+    return byMonth;
+  }, [refunds]);
 
   useEffect(() => {
     if (usersData) {
@@ -53,19 +55,13 @@ export default function RefundLogsPage() {
     }
   }, [usersData]);
 
-  useEffect(() => {
-    if (userInfo) {
-      setRefundLogs(userInfo[0] || {});
-    }
-  }, [userInfo]);
-
   useEffect(() => {
     if (status === "unauthenticated") {
       router.push("/");
     }
   }, [status]);
 
-  if (status === "loading" || isLoading || isUserDetailLoading) {
+  if (status === "loading" || isLoading || isLogsLoading) {
     return (
       <div className="min-h-screen flex items-center justify-center">
         <div className="animate-spin rounded-full h-8 w-8 border-b-2 border-primary"></div>
@@ -94,13 +90,13 @@ export default function RefundLogsPage() {
             <div className="grid grid-cols-2 gap-4 text-center">
               <div>
                 <p className="text-2xl font-bold text-red-700">
-                  {formatCurrency(refundLogs.totalRefunds || 0)}
+                  {formatCurrency(summary?.amount || 0)}
                 </p>
                 <p className="text-sm text-red-600">Total Refunds</p>
               </div>
               <div>
                 <p className="text-2xl font-bold text-red-700">
-                  {refundLogs.totalCases || 0}
+                  {summary?.count || 0}
                 </p>
                 <p className="text-sm text-red-600">Total Cases</p>
               </div>
@@ -131,8 +127,8 @@ export default function RefundLogsPage() {
             Monthly Breakdown
           </h2>
 
-          {refundLogs.breakdown &&
-            refundLogs.breakdown.map((log, index) => (
+          {summary?.months &&
+            summary.months.map((log, index) => (
               <div key={index} className="space-y-2">
                 <Card
                   className={`hover:shadow-md transition-shadow ${
@@ -205,32 +201,46 @@ export default function RefundLogsPage() {
                           Refund Details - {log.month || "October 2025"}
                         </h4>
                         <div className="space-y-2">
-                          {log.transactions &&
-                            log.transactions?.map((transaction, txIndex) => (
-                              <div
-                                key={txIndex}
-                                className="flex items-center justify-between p-3 bg-red-50 rounded-lg"
-                              >
-                                <div className="flex-1">
-                                  <p className="font-medium text-gray-900">
-                                    {transaction.client || "Demmo"}
-                                  </p>
-                                  <p className="text-sm text-gray-600">
-                                    {transaction.date || "2025-10-08"} • Lead #
-                                    {transaction.lead_id || "Demo"}
-                                  </p>
-                                  <p className="text-xs text-orange-600 mt-1">
-                                    Reason:{" "}
-                                    {transaction.reason || "Product not found"}
-                                  </p>
-                                </div>
-                                <div className="text-right">
-                                  <p className="font-bold text-red-600">
-                                    -{formatCurrency(transaction.amount || 0)}
-                                  </p>
-                                </div>
+                          {refundsByMonth[log.month]?.map((transaction) => (
+                            <div
+                              key={transaction.id}
+                              className="flex items-center justify-between p-3 bg-red-50 rounded-lg"
+                            >
+                              <div className="flex-1">
+                                <p className="font-medium text-gray-900">
+                                  {transaction.client || "Demmo"}
+                                </p>
+                                <p className="text-sm text-gray-600">
+                                  {transaction.date || "2025-10-08"} • Lead #
+                                  {transaction.lead_id || "Demo"}
+                                </p>
+                                <p className="text-xs text-orange-600 mt-1">
+                                  Reason:{" "}
+                                  {transaction.reason || "Product not found"}
+                                </p>
                               </div>
-                            ))}
+                              <div className="text-right">
+                                <p className="font-bold text-red-600">
+                                  -{formatCurrency(transaction.amount || 0)}
+                                </p>
+                              </div>
+                            </div>
+                          ))}
+                          {hasNextPage &&
+                            (refundsByMonth[log.month]?.length || 0) <
+                              log.count && (
+                              <Button
+                                variant="outline"
+                                size="sm"
+                                disabled={isFetchingNextPage}
+                                onClick={() => fetchNextPage()}
+                                className="w-full"
+                              >
+                                {isFetchingNextPage
+                                  ? "Loading..."
+                                  : "Load more refunds"}
+                              </Button>
+                            )}
                         </div>
                       </CardContent>
                     </Card>
@@ -0,0 +1,269 @@
+#!/usr/bin/env python3
+"""
+Google Sheets workbook fixtures for the Sales Rep Dashboard
+Sheet schema, sample data and payload builders following GOOGLE_SHEETS_INTEGRATION_GUIDE.md
+"""
+
+import csv
+import json
+import os
+from collections import OrderedDict
+from datetime import date, timedelta
+
+# Column layout of the seven sheets, in the order given by the integration guide
+SHEETS = OrderedDict([
+    ('Reps', [('rep_id', str), ('name', str), ('email', str), ('status', str),
+              ('hire_date', str)]),
+    ('Sales', [('transaction_id', str), ('rep_id', str), ('client_name', str),
+               ('amount', float), ('date', str), ('lead_id', str), ('cycle_id', str),
+               ('status', str)]),
+    ('Refunds', [('refund_id', str), ('rep_id', str), ('original_transaction_id', str),
+                 ('client_name', str), ('amount', float), ('date', str), ('reason', str),
+                 ('cycle_id', str)]),
+    ('Targets', [('target_id', str), ('rep_id', str), ('cycle_id', str),
+                 ('target_amount', float), ('start_date', str), ('end_date', str)]),
+    ('Activities', [('activity_id', str), ('rep_id', str), ('lead_id', str),
+                    ('activity_type', str), ('points', float), ('date', str),
+                    ('description', str), ('bonus_type', str), ('cycle_id', str)]),
+    ('Rules', [('rule_type', str), ('stage_name', str), ('base_points', float),
+               ('bonus_name', str), ('bonus_points', float), ('bonus_condition', str)]),
+    ('Levels', [('level_name', str), ('min_points', float), ('max_points', float),
+                ('commission_bonus', float), ('icon', str), ('description', str)]),
+])
+
+def _rows(sheet, *values):
+    columns = [name for name, _ in SHEETS[sheet]]
+    return [dict(zip(columns, row)) for row in values]
+
+# Sample workbook from the integration guide, completed with the sheets it
+# leaves empty so every payload field has data behind it
+SAMPLE_WORKBOOK = {
+    'Reps': _rows('Reps',
+        ('r_102', 'Pawan Sankhala', 'pawan@maaruji.com', 'active', '2024-01-15'),
+        ('r_103', 'Ravi Kumar', 'ravi@cronberry.com', 'active', '2024-02-01'),
+        ('r_104', 'Anjali Sharma', 'anjali@maaruji.com', 'active', '2024-03-15'),
+    ),
+    'Sales': _rows('Sales',
+        ('TXN_001', 'r_102', 'TechCorp Ltd', 12000, '2025-09-25', 'TC001', '2025Q3', 'confirmed'),
+        ('TXN_002', 'r_102', 'StartupX', 8500, '2025-09-22', 'SX002', '2025Q3', 'confirmed'),
+        ('TXN_003', 'r_103', 'Global Corp', 18000, '2025-08-28', 'GC005', '2025Q3', 'confirmed'),
+    ),
+    'Refunds': _rows('Refunds',
+        ('REF_001', 'r_102', 'TXN_001', 'TechCorp Ltd', 2500, '2025-09-28',
+         'Product not as described', '2025Q3'),
+    ),
+    'Targets': _rows('Targets',
+        ('TGT_001', 'r_102', '2025Q3', 400000, '2025-07-01', '2025-09-30'),
+        ('TGT_002', 'r_103', '2025Q3', 350000, '2025-07-01', '2025-09-30'),
+        ('TGT_003', 'r_104', '2025Q3', 300000, '2025-07-01', '2025-09-30'),
+    ),
+    'Activities': _rows('Activities',
+        ('ACT_001', 'r_102', 'LB', 'closure', 400, '2025-09-06', 'Closure Won (Lead #LB)', 'speed', '2025Q3'),
+        ('ACT_002', 'r_102', 'LB', 'demo', 50, '2025-09-05', 'Demo Done (Lead #LB)', 'none', '2025Q3'),
+        ('ACT_003', 'r_102', 'LB', 'contact', 30, '2025-09-03', 'Demo Scheduled (Lead #LB)', 'quality', '2025Q3'),
+    ),
+    'Rules': _rows('Rules',
+        ('points', 'contact', 20, 'Speed Bonus', 10, 'Contacted within 15 minutes'),
+        ('points', 'demo', 50, 'Quality Bonus', 20, 'Demo rated 4+ by client'),
+        ('points', 'closure', 400, 'Upsell Bonus', 100, 'Closed above list price'),
+    ),
+    'Levels': _rows('Levels',
+        ('Rookie', 0, 499, 0, '🎯', 'Getting started'),
+        ('Hunter', 500, 999, 10, '🥉', 'Consistent performer'),
+        ('Striker', 1000, 1499, 20, '🥇', 'Top performer with priority leads'),
+        ('Slayer', 1500, 999999, 30, '👑', 'Elite closer'),
+    ),
+}
+
+def coerce_row(sheet, row):
+    """Convert a raw sheet row (strings from CSV) to typed values"""
+    typed = {}
+    for name, kind in SHEETS[sheet]:
+        value = row.get(name, '')
+        if kind is float:
+            value = float(value) if value not in ('', None) else 0.0
+            if value.is_integer():
+                value = int(value)
+        elif value is None:
+            value = ''
+        typed[name] = value
+    return typed
+
+def iter_sheet(path, sheet):
+    """Stream rows of one sheet from <path>/<sheet>.csv or <path>/<sheet>.jsonl"""
+    csv_path = os.path.join(path, f"{sheet}.csv")
+    jsonl_path = os.path.join(path, f"{sheet}.jsonl")
+    if os.path.exists(csv_path):
+        with open(csv_path, newline='', encoding='utf-8') as f:
+            for row in csv.DictReader(f):
+                yield coerce_row(sheet, row)
+    elif os.path.exists(jsonl_path):
+        with open(jsonl_path, encoding='utf-8') as f:
+            for line in f:
+                if line.strip():
+                    yield coerce_row(sheet, json.loads(line))
+
+def load_workbook(path=None):
+    """Load a workbook from a directory of per-sheet CSV/JSONL files or a JSON file.
+
+    Sheets missing from the fixture are empty. With no path the guide's sample
+    workbook is returned.
+    """
+    if path is None:
+        return {sheet: list(rows) for sheet, rows in SAMPLE_WORKBOOK.items()}
+    if os.path.isdir(path):
+        return {sheet: list(iter_sheet(path, sheet)) for sheet in SHEETS}
+    with open(path, encoding='utf-8') as f:
+        raw = json.load(f)
+    return {sheet: [coerce_row(sheet, row) for row in raw.get(sheet, [])] for sheet in SHEETS}
+
+def month_label(iso_date):
+    """'2025-09-25' -> 'September 2025'"""
+    return date.fromisoformat(iso_date[:10]).strftime('%B %Y')
+
+def level_for(points, levels):
+    """Name of the highest level whose min_points threshold is reached"""
+    name = None
+    best = None
+    for level in levels:
+        if points >= level['min_points'] and (best is None or level['min_points'] > best):
+            name, best = level['level_name'], level['min_points']
+    return name
+
+def build_users(workbook):
+    """Payload of the FETCH_USERS deployment: the active roster"""
+    return [{'rep': rep['name'], 'rep_id': rep['rep_id'], 'email': rep['email']}
+            for rep in workbook['Reps'] if rep['status'] == 'active']
+
+def find_rep(workbook, rep):
+    """Look a rep up by name or rep_id"""
+    for row in workbook['Reps']:
+        if rep in (row['name'], row['rep_id']):
+            return row
+    return None
+
+def latest_cycle(workbook, rep_id):
+    """Most recent cycle_id with a target for the rep"""
+    cycles = [t['cycle_id'] for t in workbook['Targets'] if t['rep_id'] == rep_id]
+    return max(cycles) if cycles else None
+
+def as_of_date(workbook):
+    """Latest date seen in the activity sheets, used as 'today' for the payload"""
+    dates = [row['date'] for sheet in ('Sales', 'Refunds', 'Activities')
+             for row in workbook[sheet] if row['date']]
+    return max(dates) if dates else date.today().isoformat()
+
+def build_user_detail(workbook, rep, cycle_id=None, as_of=None):
+    """Payload of the FETCH_USER_DETAIL deployment for ?rep=<name or rep_id>.
+
+    A straightforward row-by-row scan of every sheet, mirroring what the Apps
+    Script does today. Returns [] for unknown reps, like the deployment.
+    """
+    rep_row = find_rep(workbook, rep)
+    if rep_row is None:
+        return []
+    rep_id = rep_row['rep_id']
+    cycle_id = cycle_id or latest_cycle(workbook, rep_id)
+    as_of = as_of or as_of_date(workbook)
+    week_start = (date.fromisoformat(as_of) - timedelta(days=6)).isoformat()
+
+    target = 0
+    for row in workbook['Targets']:
+        if row['rep_id'] == rep_id and row['cycle_id'] == cycle_id:
+            target = row['target_amount']
+
+    sales = [row for row in workbook['Sales']
+             if row['rep_id'] == rep_id and row['cycle_id'] == cycle_id
+             and row['status'] == 'confirmed']
+    lead_by_transaction = {row['transaction_id']: row['lead_id'] for row in workbook['Sales']}
+    refunds = [row for row in workbook['Refunds']
+               if row['rep_id'] == rep_id and row['cycle_id'] == cycle_id]
+    activities = [row for row in workbook['Activities']
+                  if row['rep_id'] == rep_id and row['cycle_id'] == cycle_id]
+
+    achieved = sum(row['amount'] for row in sales)
+    refunded = sum(row['amount'] for row in refunds)
+    points = sum(row['points'] for row in activities)
+    level = level_for(points, workbook['Levels'])
+    commission = 0
+    for row in workbook['Levels']:
+        if row['level_name'] == level:
+            commission = row['commission_bonus']
+    incentive_total = round((achieved - refunded) * commission / 100)
+    incentive_monthly = round(incentive_total / 2)
+
+    this_week = [row for row in activities if week_start <= row['date'] <= as_of]
+    recent = sorted(activities, key=lambda row: (row['date'], row['activity_id']), reverse=True)
+
+    sales_months = OrderedDict()
+    for row in sorted(sales, key=lambda row: (row['date'], row['transaction_id']), reverse=True):
+        month = sales_months.setdefault(month_label(row['date']),
+                                        {'total': 0, 'deals': 0, 'transactions': []})
+        month['total'] += row['amount']
+        month['deals'] += 1
+        month['transactions'].append({
+            'transaction_id': row['transaction_id'],
+            'client': row['client_name'],
+            'date': row['date'],
+            'lead_id': row['lead_id'],
+            'amount': row['amount'],
+        })
+
+    refund_months = OrderedDict()
+    for row in sorted(refunds, key=lambda row: (row['date'], row['refund_id']), reverse=True):
+        month = refund_months.setdefault(month_label(row['date']),
+                                         {'total': 0, 'count': 0, 'transactions': []})
+        month['total'] += row['amount']
+        month['count'] += 1
+        month['transactions'].append({
+            'refund_id': row['refund_id'],
+            'client': row['client_name'],
+            'date': row['date'],
+            'lead_id': lead_by_transaction.get(row['original_transaction_id'], ''),
+            'reason': row['reason'],
+            'amount': row['amount'],
+        })
+
+    return [{
+        'rep': rep_row['name'],
+        'rep_id': rep_id,
+        'cycle_id': cycle_id,
+        'last_computed_at': f"{as_of}T00:00:00Z",
+        'target': target,
+        'achieved': achieved,
+        'refunds': refunded,
+        'remaining': max(0, target - (achieved - refunded)),
+        'points': points,
+        'level': level,
+        'incentiveTotal': incentive_total,
+        'incentiveMonthly': incentive_monthly,
+        'incentiveQuarterly': incentive_total - incentive_monthly,
+        'demos': sum(1 for row in this_week if row['activity_type'] == 'demo'),
+        'closures': sum(1 for row in this_week if row['activity_type'] == 'closure'),
+        'rewards': [f"{row['date']} | {row['points']} pts {row['description']}"
+                    for row in recent[:10]],
+        'totalArchive': achieved,
+        'totalDeals': len(sales),
+        'breakdown': [dict(month=name, **values) for name, values in sales_months.items()],
+        'totalRefunds': refunded,
+        'totalCases': len(refunds),
+        'refundBreakdown': [dict(month=name, **values) for name, values in refund_months.items()],
+    }]
+
+def build_leaderboard(workbook, cycle_id, limit=200):
+    """Cycle leaderboard as the guide's getLeaderboard describes it: aggregate
+    Activities points per rep, join Reps for names, rank by points descending.
+    """
+    points = {}
+    for row in workbook['Activities']:
+        if row['cycle_id'] == cycle_id:
+            points[row['rep_id']] = points.get(row['rep_id'], 0) + row['points']
+    names = {row['rep_id']: row['name'] for row in workbook['Reps']}
+    ranked = sorted(points.items(), key=lambda item: (-item[1], item[0]))[:limit]
+    return [{
+        'rank': rank,
+        'rep_id': rep_id,
+        'rep_name': names.get(rep_id, rep_id),
+        'points_total': total,
+        'level': level_for(total, workbook['Levels']),
+    } for rank, (rep_id, total) in enumerate(ranked, start=1)]
@@ -0,0 +1,379 @@
+#!/usr/bin/env python3
+"""
+Local Google Apps Script stand-in for performance testing
+Serves the FETCH_USERS / FETCH_USER_DETAIL /exec JSON from a fixture workbook,
+with configurable per-route latency, failure injection and request counters.
+
+Point the Next server at it with:
+    NEXT_PUBLIC_GAS_BASE_URL=http://127.0.0.1:8790/macros/s/
+"""
+
+import argparse
+import json
+import math
+import os
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+from gas_fixtures import SHEETS, coerce_row, load_workbook, build_users, build_user_detail
+
+API_URL_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                            "app", "api-main-file", "APIUrl.js")
+
+# Route names for the deployments exported by APIUrl.js
+ROUTE_NAMES = {
+    'FETCH_USERS': 'users',
+    'FETCH_USER_DETAIL': 'user_detail',
+}
+
+def read_deployments(api_url_file=API_URL_FILE):
+    """Map deployment id -> route name, parsed from APIUrl.js so the ids stay in sync"""
+    with open(api_url_file, encoding='utf-8') as f:
+        source = f.read()
+    deployments = {}
+    pattern = r'export const (\w+)\s*=\s*BASE_URL\s*\+\s*"([^"/]+)/exec"'
+    for constant, deployment_id in re.findall(pattern, source):
+        if constant in ROUTE_NAMES:
+            deployments[deployment_id] = ROUTE_NAMES[constant]
+    return deployments
+
+class LatencyModel:
+    """Injected latency distribution, parsed from specs such as:
+
+        0                  no added latency
+        fixed:200          always 200ms
+        uniform:100:800    uniform between 100 and 800ms
+        lognormal:800:0.5  lognormal with 800ms median and sigma 0.5
+    """
+
+    def __init__(self, spec="0"):
+        self.spec = str(spec)
+        parts = self.spec.split(':')
+        self.kind = parts[0] if len(parts) > 1 else 'fixed'
+        self.params = [float(p) for p in (parts[1:] if len(parts) > 1 else parts)]
+        if self.kind not in ('fixed', 'uniform', 'lognormal'):
+            raise ValueError(f"Unknown latency distribution: {self.spec}")
+
+    def sample(self, rng):
+        """Draw one latency in seconds"""
+        if self.kind == 'fixed':
+            ms = self.params[0]
+        elif self.kind == 'uniform':
+            ms = rng.uniform(self.params[0], self.params[1])
+        else:
+            ms = rng.lognormvariate(math.log(self.params[0]), self.params[1])
+        return max(0.0, ms) / 1000.0
+
+class RouteConfig:
+    """Latency and failure behaviour for one route"""
+
+    ERROR_MODES = ('status', 'html', 'hang')
+
+    def __init__(self, latency="0", error_rate=0.0, error_mode='status', error_status=500):
+        if error_mode not in self.ERROR_MODES:
+            raise ValueError(f"Unknown error mode: {error_mode}")
+        self.latency = LatencyModel(latency)
+        self.error_rate = float(error_rate)
+        self.error_mode = error_mode
+        self.error_status = int(error_status)
+
+    def to_dict(self):
+        return {
+            'latency': self.latency.spec,
+            'error_rate': self.error_rate,
+            'error_mode': self.error_mode,
+            'error_status': self.error_status,
+        }
+
+class RouteStats:
+    """Request counters for one route (guarded by the server lock)"""
+
+    def __init__(self):
+        self.requests = 0
+        self.errors = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.injected_latency = 0.0
+        self.queries = {}
+
+    def to_dict(self):
+        return {
+            'requests': self.requests,
+            'errors': self.errors,
+            'in_flight': self.in_flight,
+            'max_in_flight': self.max_in_flight,
+            'injected_latency': round(self.injected_latency, 3),
+            'queries': dict(self.queries),
+        }
+
+class GasStubServer:
+    """Threaded HTTP server standing in for the Apps Script deployments"""
+
+    def __init__(self, workbook=None, host="127.0.0.1", port=8790, routes=None, seed=None,
+                 deployments=None):
+        self.workbook = workbook if workbook is not None else load_workbook()
+        self.host = host
+        self.port = port
+        self.deployments = deployments if deployments is not None else read_deployments()
+        self.routes = {'*': RouteConfig()}
+        self.routes.update(routes or {})
+        self.stats = {}
+        self.rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self._bodies = {}
+        self._generation = 0
+        self._httpd = None
+        self._thread = None
+
+    @property
+    def gas_base_url(self):
+        """Value for NEXT_PUBLIC_GAS_BASE_URL"""
+        return f"http://{self.host}:{self.port}/macros/s/"
+
+    def route_config(self, route):
+        return self.routes.get(route, self.routes['*'])
+
+    def configure(self, routes):
+        """Replace the config of the given routes ({route: {latency, error_rate, ...}})"""
+        with self._lock:
+            for route, options in routes.items():
+                self.routes[route] = RouteConfig(**options)
+
+    def snapshot_stats(self):
+        with self._lock:
+            return {route: stats.to_dict() for route, stats in self.stats.items()}
+
+    def reset_stats(self):
+        with self._lock:
+            self.stats = {}
+
+    def append_rows(self, sheet, rows):
+        """Append rows to a sheet, as if entered in the spreadsheet; later payloads include them"""
+        if sheet not in SHEETS:
+            raise ValueError(f"Unknown sheet: {sheet}")
+        rows = [coerce_row(sheet, row) for row in rows]
+        with self._lock:
+            # Copy on write: a payload being built keeps the workbook it started from
+            self.workbook = dict(self.workbook, **{sheet: self.workbook[sheet] + rows})
+            self._generation += 1
+            self._bodies = {}
+        return len(rows)
+
+    def payload(self, route, query):
+        """Serialized JSON body for a route, memoized per query and workbook generation"""
+        query_key = (route, tuple(sorted((k, tuple(v)) for k, v in query.items())))
+        with self._lock:
+            generation, workbook = self._generation, self.workbook
+            body = self._bodies.get((generation, query_key))
+        if body is None:
+            if route == 'users':
+                data = build_users(workbook)
+            else:
+                rep = query.get('rep', [''])[0]
+                cycle_id = query.get('cycle_id', [None])[0]
+                data = build_user_detail(workbook, rep, cycle_id)
+            body = json.dumps(data).encode('utf-8')
+            with self._lock:
+                # Rows appended meanwhile make this body stale; serve it, don't keep it
+                if self._generation == generation:
+                    self._bodies[(generation, query_key)] = body
+        return body
+
+    def begin(self, route, query_string):
+        """Count a request and decide its injected latency and failure"""
+        with self._lock:
+            stats = self.stats.setdefault(route, RouteStats())
+            stats.requests += 1
+            stats.in_flight += 1
+            stats.max_in_flight = max(stats.max_in_flight, stats.in_flight)
+            stats.queries[query_string] = stats.queries.get(query_string, 0) + 1
+            config = self.route_config(route)
+            delay = config.latency.sample(self.rng)
+            failed = self.rng.random() < config.error_rate
+            if failed:
+                stats.errors += 1
+            stats.injected_latency += delay
+        return config, delay, failed
+
+    def end(self, route):
+        with self._lock:
+            stats = self.stats.get(route)
+            if stats is not None:
+                stats.in_flight = max(0, stats.in_flight - 1)
+
+    def _handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            # Headers and body go out as separate writes; without TCP_NODELAY
+            # a kept-alive client waits ~40ms on delayed ACK for the body
+            disable_nagle_algorithm = True
+
+            def log_message(self, format, *args):
+                pass
+
+            def send_body(self, status, body, content_type="application/json"):
+                self.send_response(status)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                try:
+                    self.wfile.write(body)
+                except (BrokenPipeError, ConnectionResetError):
+                    # The client gave up, e.g. a hedged request that lost the race
+                    pass
+
+            def send_json(self, status, data):
+                self.send_body(status, json.dumps(data).encode('utf-8'))
+
+            def do_GET(self):
+                parsed = urlparse(self.path)
+                if parsed.path == '/__stats':
+                    return self.send_json(200, server.snapshot_stats())
+                if parsed.path == '/__config':
+                    return self.send_json(200, {route: config.to_dict()
+                                                for route, config in server.routes.items()})
+
+                match = re.search(r'/([^/]+)/exec$', parsed.path)
+                route = server.deployments.get(match.group(1)) if match else None
+                if route is None:
+                    return self.send_json(404, {'error': 'Script not found'})
+
+                config, delay, failed = server.begin(route, parsed.query)
+                try:
+                    time.sleep(delay)
+                    if failed and config.error_mode == 'hang':
+                        # Hold the connection well past any sane client timeout
+                        time.sleep(300)
+                        return
+                    if failed and config.error_mode == 'html':
+                        # Apps Script reports script errors as a 200 HTML page
+                        return self.send_body(200, b"<html><body>Exception: Service invoked "
+                                              b"too many times</body></html>", "text/html")
+                    if failed:
+                        return self.send_json(config.error_status, {'error': 'Injected failure'})
+                    self.send_body(200, server.payload(route, parse_qs(parsed.query)))
+                finally:
+                    server.end(route)
+
+            def do_POST(self):
+                length = int(self.headers.get('Content-Length') or 0)
+                try:
+                    body = json.loads(self.rfile.read(length) or b'{}')
+                except ValueError:
+                    return self.send_json(400, {'error': 'Invalid JSON body'})
+                if self.path == '/__stats/reset':
+                    server.reset_stats()
+                    return self.send_json(200, {'reset': True})
+                if self.path == '/__config':
+                    if not isinstance(body, dict):
+                        return self.send_json(400, {'error': 'Config body must be a JSON object'})
+                    try:
+                        server.configure(body)
+                    except (TypeError, ValueError) as e:
+                        return self.send_json(400, {'error': str(e)})
+                    return self.send_json(200, {'configured': sorted(body)})
+                if self.path.startswith('/__workbook/'):
+                    # {"rows": [{column: value, ...}]} appended to the named sheet
+                    try:
+                        count = server.append_rows(self.path.split('/')[-1], body.get('rows', []))
+                    except (AttributeError, TypeError, ValueError) as e:
+                        return self.send_json(400, {'error': str(e)})
+                    return self.send_json(200, {'appended': count})
+                self.send_json(405, {'error': 'Method not allowed'})
+
+        return Handler
+
+    def start(self):
+        """Start serving on a background thread"""
+        self._httpd = ThreadingHTTPServer((self.host, self.port), self._handler())
+        self._httpd.daemon_threads = True
+        self.port = self._httpd.server_address[1]
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        if self._httpd:
+            self._httpd.shutdown()
+            self._httpd.server_close()
+            self._httpd = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+def parse_route_options(latency=(), error_rate=(), error_mode=()):
+    """Build {route: options} from repeatable ROUTE=VALUE command line options"""
+    routes = {}
+    for option, values in (('latency', latency), ('error_rate', error_rate),
+                           ('error_mode', error_mode)):
+        for item in values:
+            route, _, value = item.partition('=')
+            if not value:
+                route, value = '*', route
+            routes.setdefault(route, {})[option] = value
+    return routes
+
+def load_config(path):
+    """Read a JSON config: {"seed": 1, "routes": {"users": {"latency": "..."}}}"""
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)
+
+def create_server(host="127.0.0.1", port=8790, fixture=None, config=None, seed=None,
+                  latency=(), error_rate=(), error_mode=()):
+    """Build a GasStubServer from a fixture path, an optional JSON config and CLI overrides"""
+    options = load_config(config) if config else {}
+    routes = options.get('routes', {})
+    for route, overrides in parse_route_options(latency, error_rate, error_mode).items():
+        routes.setdefault(route, {}).update(overrides)
+    return GasStubServer(
+        workbook=load_workbook(fixture),
+        host=host,
+        port=port,
+        routes={route: RouteConfig(**values) for route, values in routes.items()},
+        seed=seed if seed is not None else options.get('seed'),
+    )
+
+def add_stub_arguments(parser, prefix=""):
+    """Register the stand-in's options on an argparse parser"""
+    parser.add_argument(f"--{prefix}fixture",
+                        help="Workbook directory (per-sheet CSV/JSONL) or JSON file (default: guide sample)")
+    parser.add_argument(f"--{prefix}config", help="JSON file with seed and per-route settings")
+    parser.add_argument(f"--{prefix}seed", type=int, help="Seed for latency and failure sampling")
+    parser.add_argument(f"--{prefix}latency", action="append", default=[],
+                        help="[ROUTE=]SPEC, e.g. user_detail=lognormal:800:0.5 (repeatable)")
+    parser.add_argument(f"--{prefix}error-rate", action="append", default=[],
+                        help="[ROUTE=]RATE, e.g. users=0.05 (repeatable)")
+    parser.add_argument(f"--{prefix}error-mode", action="append", default=[],
+                        help="[ROUTE=]MODE, one of status/html/hang (repeatable)")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Local Google Apps Script stand-in")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8790)
+    add_stub_arguments(parser)
+    args = parser.parse_args(argv)
+
+    server = create_server(args.host, args.port, args.fixture, args.config, args.seed,
+                           args.latency, args.error_rate, args.error_mode)
+    server.start()
+    print(f"🧪 GAS stand-in listening on http://{server.host}:{server.port}")
+    print(f"   NEXT_PUBLIC_GAS_BASE_URL={server.gas_base_url}")
+    for deployment_id, route in server.deployments.items():
+        print(f"   {route}: {server.gas_base_url}{deployment_id}/exec")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.stop()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+"""
+Pooled keep-alive HTTP session with per-phase request timing
+A requests.Session whose connections record DNS, TCP connect and TLS
+handshake times when they are opened, and whose adapter records time to first
+byte and body transfer for every request. Requests on a reused connection
+have no setup phases, which separates network overhead from server time.
+
+requests/urllib3 speak HTTP/1.1 only; the protocol each response used is
+recorded so a run through an HTTP/2-capable client can be told apart.
+"""
+
+import socket
+import threading
+import time
+from collections import deque
+from http.cookiejar import DefaultCookiePolicy
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+
+PHASES = ('dns', 'connect', 'tls', 'ttfb', 'transfer')
+SETUP_PHASES = ('dns', 'connect', 'tls')
+
+# Phases of the request in flight on this thread (set by TimedAdapter.send)
+_current = threading.local()
+
+def _record(name, seconds):
+    phases = getattr(_current, 'phases', None)
+    if phases is not None:
+        phases[name] = phases.get(name, 0.0) + seconds
+
+def _setup_time():
+    phases = getattr(_current, 'phases', None) or {}
+    return sum(phases.get(name, 0.0) for name in SETUP_PHASES)
+
+class _TimedConnect:
+    """Connection mixin that times name resolution and TCP connect separately"""
+
+    def _new_conn(self):
+        start = time.perf_counter()
+        try:
+            addresses = socket.getaddrinfo(self._dns_host, self.port, type=socket.SOCK_STREAM)
+        except socket.gaierror:
+            addresses = None  # let urllib3 raise its own resolution error
+        resolved = time.perf_counter()
+        _record('dns', resolved - start)
+
+        # Connect to the address just resolved instead of resolving again
+        dns_host = self._dns_host
+        if addresses:
+            self._dns_host = addresses[0][4][0]
+        try:
+            return super()._new_conn()
+        finally:
+            self._dns_host = dns_host
+            _record('connect', time.perf_counter() - resolved)
+
+class TimedHTTPConnection(_TimedConnect, HTTPConnection):
+    pass
+
+class TimedHTTPSConnection(_TimedConnect, HTTPSConnection):
+    """HTTPSConnection that also times the TLS handshake"""
+
+    def connect(self):
+        start = time.perf_counter()
+        before = _setup_time()
+        super().connect()
+        _record('tls', max(0.0, time.perf_counter() - start - (_setup_time() - before)))
+
+class TimedHTTPConnectionPool(HTTPConnectionPool):
+    ConnectionCls = TimedHTTPConnection
+
+class TimedHTTPSConnectionPool(HTTPSConnectionPool):
+    ConnectionCls = TimedHTTPSConnection
+
+class TimedAdapter(HTTPAdapter):
+    """HTTPAdapter that attaches a .phases dict to every response and logs it"""
+
+    def __init__(self, session, **kwargs):
+        self.session = session
+        super().__init__(**kwargs)
+
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {
+            'http': TimedHTTPConnectionPool,
+            'https': TimedHTTPSConnectionPool,
+        }
+
+    def send(self, request, stream=False, **kwargs):
+        phases = {}
+        _current.phases = phases
+        start = time.perf_counter()
+        try:
+            response = super().send(request, stream=stream, **kwargs)
+        finally:
+            _current.phases = None
+        headers_at = time.perf_counter()
+
+        setup = sum(phases.get(name, 0.0) for name in SETUP_PHASES)
+        phases['ttfb'] = max(0.0, headers_at - start - setup)
+        if not stream:
+            response.content  # read the body here so its transfer time is ours
+            phases['transfer'] = time.perf_counter() - headers_at
+        for name in PHASES:
+            phases.setdefault(name, 0.0)
+        phases['reused'] = 'connect' not in phases or not phases['connect']
+        phases['total'] = time.perf_counter() - start
+        phases['status'] = response.status_code
+        phases['http_version'] = {10: 'HTTP/1.0', 11: 'HTTP/1.1', 20: 'HTTP/2'}.get(
+            getattr(response.raw, 'version', None), '?')
+        response.phases = phases
+        self.session.log_phases(request, phases)
+        return response
+
+class TimedSession(requests.Session):
+    """requests.Session with a pooled keep-alive adapter that times every request.
+
+    pool_size bounds the connections kept per host; set it to at least the
+    number of threads sharing the session. keep_alive=False sends
+    Connection: close so every request pays for a new connection.
+    max_timings keeps only the latest timings, for long runs.
+    """
+
+    def __init__(self, pool_size=10, keep_alive=True, max_timings=None):
+        super().__init__()
+        # Share connections, not state: like requests.get, no cookie carries
+        # over from one request to the next
+        self.cookies.set_policy(DefaultCookiePolicy(allowed_domains=[]))
+        self.timings = deque(maxlen=max_timings) if max_timings else []
+        self._lock = threading.Lock()
+        adapter = TimedAdapter(self, pool_connections=pool_size, pool_maxsize=pool_size)
+        self.mount('http://', adapter)
+        self.mount('https://', adapter)
+        if not keep_alive:
+            self.headers['Connection'] = 'close'
+
+    def log_phases(self, request, phases):
+        with self._lock:
+            self.timings.append(dict(phases, method=request.method, url=request.url))
@@ -0,0 +1,34 @@
+#!/usr/bin/env python3
+"""
+Latency percentiles shared by backend_test.py and log_replay.py
+Percentiles use linear interpolation between the closest ranks; summaries
+take latencies in seconds and report rounded milliseconds.
+"""
+
+import math
+
+def percentile(values, pct):
+    """Return the pct-th percentile of values using linear interpolation"""
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = (len(ordered) - 1) * pct / 100.0
+    lower = math.floor(rank)
+    upper = math.ceil(rank)
+    if lower == upper:
+        return ordered[int(rank)]
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (rank - lower)
+
+def latency_summary(values):
+    """Summarize a list of latencies (seconds) as rounded milliseconds"""
+    if not values:
+        return {'p50': None, 'p90': None, 'p95': None, 'p99': None, 'max': None, 'mean': None}
+    to_ms = lambda v: round(v * 1000, 2)
+    return {
+        'p50': to_ms(percentile(values, 50)),
+        'p90': to_ms(percentile(values, 90)),
+        'p95': to_ms(percentile(values, 95)),
+        'p99': to_ms(percentile(values, 99)),
+        'max': to_ms(max(values)),
+        'mean': to_ms(sum(values) / len(values)),
+    }
@@ -0,0 +1,428 @@
+#!/usr/bin/env python3
+"""
+Materialized per-cycle leaderboard snapshots
+Keeps running points totals per (cycle, rep) in a small state file next to the
+fixture's per-sheet CSV/JSONL files and remembers how far each sheet has been
+read, so rows appended to Activities or Reps are folded in without parsing
+the sheets again. Next to each offset it keeps the file's size, mtime and
+inode and a SHA-1 of the last 64 KiB read; a sheet that was replaced, shrank
+or changed within that window (rewritten or edited in place) forces a full
+rebuild. Edits further back than the window are not noticed. Every touched
+cycle is rewritten as a compact, versioned <cycle_id>.json that
+/api/leaderboard serves as-is.
+
+Build or update the snapshots of a workbook directory:
+    python leaderboard_snapshot.py /tmp/workbook --out /tmp/snapshots
+Check incremental updates against a full rebuild and time both:
+    python leaderboard_snapshot.py /tmp/workbook --benchmark
+"""
+
+import argparse
+import csv
+import hashlib
+import io
+import json
+import os
+import re
+import shutil
+import tempfile
+import time
+from datetime import datetime, timezone
+
+import gas_fixtures
+from gas_fixtures import SHEETS, coerce_row, level_for
+
+STATE_FILE = 'state.json'
+INDEX_FILE = 'index.json'
+STATE_FORMAT = 3
+CHECK_WINDOW = 64 * 1024
+
+# Sheets whose appended rows change a leaderboard; Levels is small and is
+# compared by content hash instead, any change forcing a rebuild
+TRACKED_SHEETS = ('Reps', 'Activities')
+
+def sheet_path(fixture, sheet):
+    """(path, format) of a sheet's file in a fixture directory, or (None, None)"""
+    for fmt in ('csv', 'jsonl'):
+        path = os.path.join(fixture, f"{sheet}.{fmt}")
+        if os.path.exists(path):
+            return path, fmt
+    return None, None
+
+def window_hash(f, offset):
+    """SHA-1 of the CHECK_WINDOW bytes of open file f that end at offset"""
+    start = max(0, offset - CHECK_WINDOW)
+    f.seek(start)
+    return hashlib.sha1(f.read(offset - start)).hexdigest()
+
+def read_appended(fixture, sheet, offset, mark=None):
+    """Rows of a sheet past byte offset, the offset after the last complete line
+    and a mark to pass back with it next time.
+
+    The mark holds the file's size, mtime and inode, unchanged meaning nothing
+    was appended, and the hash of the bytes just before offset. Returns (None,
+    offset, mark) when the file was replaced, shrank below offset or changed
+    within that window, i.e. was not only appended to. A trailing line without
+    its newline is left for the next call.
+    """
+    path, fmt = sheet_path(fixture, sheet)
+    if path is None:
+        return ([], 0, None) if offset == 0 else (None, offset, mark)
+    stat = os.stat(path)
+    if stat.st_size < offset or (mark and stat.st_ino != mark['inode']):
+        return None, offset, mark
+    if mark and (stat.st_size, stat.st_mtime_ns) == (mark['size'], mark['mtime_ns']):
+        return [], offset, mark
+
+    with open(path, 'rb') as f:
+        if mark and window_hash(f, offset) != mark['window']:
+            return None, offset, mark
+        f.seek(0)
+        header = f.readline()
+        start = len(header) if fmt == 'csv' and offset == 0 else offset
+        f.seek(start)
+        data = f.read()
+        end = data.rfind(b'\n') + 1
+        mark = {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns, 'inode': stat.st_ino,
+                'window': window_hash(f, start + end)}
+    text = data[:end].decode('utf-8')
+
+    if fmt == 'csv':
+        columns = next(csv.reader([header.decode('utf-8-sig')]))
+        rows = [coerce_row(sheet, row) for row in csv.DictReader(io.StringIO(text, newline=''),
+                                                                  fieldnames=columns)]
+    else:
+        rows = [coerce_row(sheet, json.loads(line)) for line in text.splitlines() if line.strip()]
+    return rows, start + end, mark
+
+def levels_hash(fixture):
+    path, _ = sheet_path(fixture, 'Levels')
+    if path is None:
+        return None
+    with open(path, 'rb') as f:
+        return hashlib.sha1(f.read()).hexdigest()
+
+def write_json(path, data):
+    """Write compact JSON atomically, so readers never see a partial file"""
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        # dumps uses the C encoder in one pass; dump encodes piecewise in Python
+        f.write(json.dumps(data, separators=(',', ':'), ensure_ascii=False))
+    os.replace(tmp_path, path)
+
+class LeaderboardSnapshots:
+    """Incrementally maintained leaderboards for every cycle of a fixture directory"""
+
+    def __init__(self, fixture, out_dir):
+        self.fixture = fixture
+        self.out_dir = out_dir
+        self.state = None
+        self.fresh_index = False
+
+    def empty_state(self):
+        return {
+            'format': STATE_FORMAT,
+            'version': 0,
+            'offsets': {sheet: 0 for sheet in TRACKED_SHEETS},
+            'marks': {sheet: None for sheet in TRACKED_SHEETS},
+            'levels_hash': None,
+            'levels': [],
+            'names': {},
+            'points': {},
+        }
+
+    def load_state(self):
+        try:
+            with open(os.path.join(self.out_dir, STATE_FILE), encoding='utf-8') as f:
+                state = json.load(f)
+        except (OSError, ValueError):
+            return None
+        return state if state.get('format') == STATE_FORMAT else None
+
+    def build(self):
+        """Full rebuild from the start of every sheet"""
+        self.state = self.empty_state()
+        previous = self.load_state()
+        if previous:
+            self.state['version'] = previous['version']
+        self.fresh_index = True
+        return self.update()
+
+    def update(self):
+        """Fold rows appended since the last run into the snapshots.
+
+        Falls back to a full rebuild when there is no state yet, Levels
+        changed, or a sheet was rewritten or edited before its offset.
+        Returns the cycles rewritten.
+        """
+        if self.state is None:
+            self.state = self.load_state()
+            if self.state is None:
+                return self.build()
+
+        state = self.state
+        current_levels = levels_hash(self.fixture)
+        if current_levels != state['levels_hash']:
+            if state['offsets'] != self.empty_state()['offsets']:
+                return self.build()
+            state['levels_hash'] = current_levels
+            state['levels'] = list(gas_fixtures.iter_sheet(self.fixture, 'Levels'))
+
+        appended = {}
+        for sheet in TRACKED_SHEETS:
+            rows, offset, mark = read_appended(self.fixture, sheet, state['offsets'][sheet],
+                                               state['marks'][sheet])
+            if rows is None:
+                return self.build()
+            appended[sheet] = (rows, offset, mark)
+
+        touched = set()
+        points = state['points']
+        for row in appended['Activities'][0]:
+            totals = points.setdefault(row['cycle_id'], {})
+            totals[row['rep_id']] = totals.get(row['rep_id'], 0) + row['points']
+            touched.add(row['cycle_id'])
+
+        renamed = set()
+        for row in appended['Reps'][0]:
+            if state['names'].get(row['rep_id']) != row['name']:
+                state['names'][row['rep_id']] = row['name']
+                renamed.add(row['rep_id'])
+        if renamed:
+            touched.update(cycle_id for cycle_id, totals in points.items()
+                           if not renamed.isdisjoint(totals))
+
+        for sheet, (_, offset, mark) in appended.items():
+            state['offsets'][sheet] = offset
+            state['marks'][sheet] = mark
+        if touched or self.fresh_index:
+            state['version'] += 1
+            self.write(set(points) if self.fresh_index else touched)
+        return sorted(touched)
+
+    def leaderboard(self, cycle_id, limit=None):
+        """Same entries as gas_fixtures.build_leaderboard, from the running totals"""
+        totals = self.state['points'].get(cycle_id, {})
+        names, levels = self.state['names'], self.state['levels']
+        ranked = sorted(totals.items(), key=lambda item: (-item[1], item[0]))[:limit]
+        return [{
+            'rank': rank,
+            'rep_id': rep_id,
+            'rep_name': names.get(rep_id, rep_id),
+            'points_total': total,
+            'level': level_for(total, levels),
+        } for rank, (rep_id, total) in enumerate(ranked, start=1)]
+
+    def write(self, cycles):
+        """Rewrite the snapshots of the given cycles, the index and the state"""
+        os.makedirs(self.out_dir, exist_ok=True)
+        version = self.state['version']
+        generated_at = datetime.now(timezone.utc).strftime('%Y-%m-%dT%H:%M:%SZ')
+        index = {'cycles': {}} if self.fresh_index else self.read_index()
+        self.fresh_index = False
+        for cycle_id in sorted(cycles):
+            board = self.leaderboard(cycle_id)
+            write_json(os.path.join(self.out_dir, f"{cycle_id}.json"), {
+                'cycle_id': cycle_id,
+                'version': version,
+                'generated_at': generated_at,
+                'leaderboard': board,
+            })
+            index['cycles'][cycle_id] = {'version': version, 'reps': len(board)}
+        index['version'] = version
+        index['generated_at'] = generated_at
+        index['latest_cycle'] = max(index['cycles']) if index['cycles'] else None
+        write_json(os.path.join(self.out_dir, INDEX_FILE), index)
+        write_json(os.path.join(self.out_dir, STATE_FILE), self.state)
+
+    def read_index(self):
+        try:
+            with open(os.path.join(self.out_dir, INDEX_FILE), encoding='utf-8') as f:
+                index = json.load(f)
+        except (OSError, ValueError):
+            index = {}
+        index.setdefault('cycles', {})
+        return index
+
+    def read_snapshot(self, cycle_id):
+        with open(os.path.join(self.out_dir, f"{cycle_id}.json"), encoding='utf-8') as f:
+            return json.load(f)
+
+def split_fixture(fixture, out_dir, share):
+    """Copy a fixture keeping the first share of each tracked sheet's rows.
+
+    Returns {sheet: remaining lines} to be appended later.
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    remainder = {}
+    for sheet in SHEETS:
+        path, fmt = sheet_path(fixture, sheet)
+        if path is None:
+            continue
+        target = os.path.join(out_dir, os.path.basename(path))
+        if sheet not in TRACKED_SHEETS:
+            shutil.copyfile(path, target)
+            continue
+        with open(path, 'rb') as f:
+            lines = f.readlines()
+        header = lines[:1] if fmt == 'csv' else []
+        body = lines[len(header):]
+        keep = int(len(body) * share)
+        with open(target, 'wb') as f:
+            f.writelines(header + body[:keep])
+        remainder[target] = body[keep:]
+    return remainder
+
+def append_lines(remainder, batches):
+    """Yield after appending each of batches equal slices of the remaining lines"""
+    for batch in range(batches):
+        for path, lines in remainder.items():
+            start = len(lines) * batch // batches
+            end = len(lines) * (batch + 1) // batches
+            with open(path, 'ab') as f:
+                f.writelines(lines[start:end])
+        yield batch
+
+def edit_in_place(fixture, offset, sheet='Activities'):
+    """Change the points of the last row of a sheet that ends by byte offset,
+    without changing the file size.
+
+    Returns False when the sheet has no such row to edit.
+    """
+    path, fmt = sheet_path(fixture, sheet)
+    if path is None:
+        return False
+    with open(path, encoding='utf-8', newline='') as f:
+        lines = f.readlines()
+    first = 1 if fmt == 'csv' else 0
+    ends = [0]
+    for text in lines:
+        ends.append(ends[-1] + len(text.encode('utf-8')))
+    target = max((i for i in range(first, len(lines)) if ends[i + 1] <= offset), default=None)
+    if target is None:
+        return False
+
+    # 50 -> 60, 9.5 -> 1.5: another value of the same length
+    bump = lambda text: re.sub(r'\d', lambda digit: str(int(digit.group()) % 9 + 1), text,
+                               count=1)
+    line = lines[target]
+    if fmt == 'csv':
+        columns = next(csv.reader([lines[0]]))
+        fields = next(csv.reader([line]))
+        position = columns.index('points')
+        fields[position] = bump(fields[position] or '0')
+        out = io.StringIO()
+        ending = '\r\n' if line.endswith('\r\n') else '\n'
+        csv.writer(out, lineterminator=ending).writerow(fields)
+        lines[target] = out.getvalue()
+    else:
+        row = json.loads(line)
+        row['points'] = json.loads(bump(json.dumps(row.get('points', 0))))
+        lines[target] = json.dumps(row, ensure_ascii=False) + '\n'
+    with open(path, 'w', encoding='utf-8', newline='') as f:
+        f.writelines(lines)
+    return True
+
+def run_benchmark(fixture, share=0.9, batches=5, limit=200):
+    """Build from a prefix of the sheets, append the rest in batches, and compare
+    the incrementally updated snapshots with a full rebuild and the row-loop
+    reference. With more than one batch, the last Activities row already read
+    is also edited in place before the last update, which has to notice the
+    edit although the sheet grew.
+    Returns a JSON-serializable report.
+    """
+    work_dir = tempfile.mkdtemp(prefix='leaderboard-')
+    try:
+        data_dir = os.path.join(work_dir, 'workbook')
+        remainder = split_fixture(fixture, data_dir, share)
+        appended_rows = sum(len(lines) for lines in remainder.values())
+
+        incremental = LeaderboardSnapshots(data_dir, os.path.join(work_dir, 'incremental'))
+        start_time = time.perf_counter()
+        incremental.build()
+        initial_build = time.perf_counter() - start_time
+
+        update_times = []
+        edited = edited_update = None
+        for batch in append_lines(remainder, batches):
+            if batch == batches - 1 and batch:
+                edited = edit_in_place(data_dir, incremental.state['offsets']['Activities'])
+            start_time = time.perf_counter()
+            incremental.update()
+            if edited:
+                edited_update = time.perf_counter() - start_time
+            else:
+                update_times.append(time.perf_counter() - start_time)
+
+        rebuilt = LeaderboardSnapshots(data_dir, os.path.join(work_dir, 'rebuild'))
+        start_time = time.perf_counter()
+        rebuilt.build()
+        full_build = time.perf_counter() - start_time
+
+        workbook = gas_fixtures.load_workbook(data_dir)
+        cycles = sorted(rebuilt.read_index()['cycles'])
+        mismatches = []
+        naive = 0.0
+        for cycle_id in cycles:
+            expected = rebuilt.read_snapshot(cycle_id)['leaderboard']
+            if incremental.read_snapshot(cycle_id)['leaderboard'] != expected:
+                mismatches.append(f"incremental:{cycle_id}")
+            start_time = time.perf_counter()
+            reference = gas_fixtures.build_leaderboard(workbook, cycle_id, limit)
+            naive += time.perf_counter() - start_time
+            if reference != expected[:limit]:
+                mismatches.append(f"reference:{cycle_id}")
+
+        return {
+            'rows': {sheet: len(rows) for sheet, rows in workbook.items()},
+            'appended_rows': appended_rows,
+            'batches': batches,
+            'edited_in_place': bool(edited),
+            'cycles': len(cycles),
+            'full_build_s': round(full_build, 4),
+            'initial_build_s': round(initial_build, 4),
+            'update_s': {
+                'mean': round(sum(update_times) / len(update_times), 4) if update_times else None,
+                'max': round(max(update_times), 4) if update_times else None,
+                'after_edit': round(edited_update, 4) if edited_update is not None else None,
+            },
+            'naive_leaderboard_ms': round(naive / len(cycles) * 1000, 3) if cycles else None,
+            'versions': {'incremental': incremental.state['version'],
+                         'rebuild': rebuilt.state['version']},
+            'mismatches': mismatches,
+        }
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build or update per-cycle leaderboard snapshots")
+    parser.add_argument("fixture", help="Workbook directory (per-sheet CSV/JSONL)")
+    parser.add_argument("--out", help="Snapshot directory (default: <fixture>/snapshots)")
+    parser.add_argument("--rebuild", action="store_true", help="Ignore saved state and rescan")
+    parser.add_argument("--benchmark", action="store_true",
+                        help="Compare incremental updates with a full rebuild on a copy")
+    parser.add_argument("--split", type=float, default=0.9,
+                        help="Share of rows in the initial build for --benchmark (default: 0.9)")
+    parser.add_argument("--batches", type=int, default=5,
+                        help="Appends of the remaining rows for --benchmark (default: 5)")
+    args = parser.parse_args(argv)
+
+    if args.benchmark:
+        report = run_benchmark(args.fixture, args.split, args.batches)
+        print(json.dumps(report, indent=2))
+        if report['mismatches']:
+            print(f"❌ {len(report['mismatches'])} snapshots differ from a full rebuild")
+            return 1
+        print("✅ Incremental snapshots match a full rebuild")
+        return 0
+
+    snapshots = LeaderboardSnapshots(args.fixture, args.out or os.path.join(args.fixture, 'snapshots'))
+    start_time = time.perf_counter()
+    touched = snapshots.build() if args.rebuild else snapshots.update()
+    elapsed = time.perf_counter() - start_time
+    print(f"Snapshot version {snapshots.state['version']}: "
+          f"{len(touched)} cycle(s) updated in {elapsed:.3f}s -> {snapshots.out_dir}")
+    return 0
+
+if __name__ == "__main__":
+    exit(main())
@@ -0,0 +1,177 @@
+// Session verification shared by middleware.js and the API route handlers.
+//
+// Decoding and verifying the NextAuth JWT is the same work for every page
+// and /api call of one browser, so the result is cached per session token:
+// keyed by a SHA-256 of the token, kept for AUTH_CACHE_TTL_MS but never past
+// the token's own exp, in a bounded Map whose insertion order is LRU order
+// (as in gas-cache.js). Concurrent checks of one token share a single
+// verification. JWT sessions cannot be revoked before exp anyway, so a short
+// cache does not extend any session. AUTH_CACHE_TTL_MS=0 turns caching off.
+//
+// The allowed Google Workspace domains are parsed once, at module load.
+// Only Web APIs are used so the module also runs in the Edge runtime of the
+// middleware; each runtime keeps its own cache.
+
+import { getToken } from "next-auth/jwt";
+
+const DEFAULT_TTL_MS = 60 * 1000;
+const DEFAULT_MAX_ENTRIES = 1000;
+const SESSION_COOKIE = /^(__Secure-)?next-auth\.session-token(\.\d+)?$/;
+
+// Local copy of gas-cache.js's envInt, which is Node-only (crypto)
+const envInt = (name, fallback) => {
+  const value = parseInt(process.env[name], 10);
+  return Number.isFinite(value) && value >= 0 ? value : fallback;
+};
+
+export function parseAllowedDomains(value) {
+  const domains = (value || "")
+    .split(",")
+    .map((domain) => domain.trim().toLowerCase())
+    .filter(Boolean);
+  return domains.length ? domains : ["cronberry.com"];
+}
+
+export const allowedDomains = parseAllowedDomains(
+  process.env.ALLOWED_GOOGLE_WORKSPACE_DOMAIN
+);
+
+export function isAllowedEmail(email) {
+  const normalized = (email || "").trim().toLowerCase();
+  return allowedDomains.some((domain) => normalized.endsWith(`@${domain}`));
+}
+
+// The raw session token of a request: the (possibly chunked) session cookie,
+// else a bearer token, as getToken() reads them
+function rawToken(request) {
+  const cookies = request.cookies
+    .getAll()
+    .filter(({ name }) => SESSION_COOKIE.test(name))
+    .map(({ name, value }) => `${name}=${value}`)
+    .sort();
+  if (cookies.length) return cookies.join(";");
+  const authorization = request.headers.get("authorization");
+  return authorization?.startsWith("Bearer ") ? authorization.slice(7) : null;
+}
+
+async function tokenKey(token) {
+  const digest = await crypto.subtle.digest(
+    "SHA-256",
+    new TextEncoder().encode(token)
+  );
+  return btoa(String.fromCharCode(...new Uint8Array(digest)));
+}
+
+function toSession(token) {
+  const email = (token.email || "").trim().toLowerCase();
+  return {
+    email,
+    name: token.name,
+    sub: token.sub,
+    exp: token.exp,
+    // Tokens without an email are not domain-checked, as before
+    allowed: !email || isAllowedEmail(email),
+  };
+}
+
+export class SessionCache {
+  constructor({ ttlMs = DEFAULT_TTL_MS, maxEntries = DEFAULT_MAX_ENTRIES } = {}) {
+    this.ttlMs = ttlMs;
+    this.maxEntries = maxEntries;
+    this.entries = new Map();
+    this.inflight = new Map();
+    this.stats = {
+      hits: 0,
+      misses: 0,
+      coalesced: 0,
+      rejected: 0,
+      evictions: 0,
+      expired: 0,
+    };
+  }
+
+  get(key) {
+    const entry = this.entries.get(key);
+    if (!entry) return undefined;
+    this.entries.delete(key);
+    if (entry.expiresAt <= Date.now()) {
+      this.stats.expired += 1;
+      return undefined;
+    }
+    this.entries.set(key, entry);
+    return entry;
+  }
+
+  set(key, session) {
+    // Invalid tokens are remembered too, so garbage cookies stay cheap
+    const expiresAt = Math.min(
+      Date.now() + this.ttlMs,
+      session?.exp ? session.exp * 1000 : Infinity
+    );
+    this.entries.delete(key);
+    this.entries.set(key, { session, expiresAt });
+    while (this.entries.size > this.maxEntries) {
+      this.entries.delete(this.entries.keys().next().value);
+      this.stats.evictions += 1;
+    }
+  }
+
+  // Resolve to { session, status } with status HIT, COALESCED or MISS;
+  // session is null for an invalid or expired token
+  async getOrVerify(key, verify) {
+    const entry = this.get(key);
+    if (entry) {
+      this.stats.hits += 1;
+      return { session: entry.session, status: "HIT" };
+    }
+
+    let promise = this.inflight.get(key);
+    if (promise) {
+      this.stats.coalesced += 1;
+      return { session: await promise, status: "COALESCED" };
+    }
+
+    this.stats.misses += 1;
+    promise = Promise.resolve()
+      .then(verify)
+      .then((session) => {
+        if (!session) this.stats.rejected += 1;
+        this.set(key, session);
+        return session;
+      })
+      .finally(() => this.inflight.delete(key));
+    this.inflight.set(key, promise);
+    return { session: await promise, status: "MISS" };
+  }
+
+  snapshot() {
+    return {
+      ...this.stats,
+      size: this.entries.size,
+      inflight: this.inflight.size,
+      ttlMs: this.ttlMs,
+      maxEntries: this.maxEntries,
+    };
+  }
+}
+
+export const sessionCache = new SessionCache({
+  ttlMs: envInt("AUTH_CACHE_TTL_MS", DEFAULT_TTL_MS),
+  maxEntries: envInt("AUTH_CACHE_MAX_ENTRIES", DEFAULT_MAX_ENTRIES),
+});
+
+// Verified session of a request: { session, status }. session is
+// { email, name, sub, exp, allowed } or null; status is NONE when the
+// request carries no token, else the cache status.
+export async function verifySession(request, cache = sessionCache) {
+  const token = rawToken(request);
+  if (!token) return { session: null, status: "NONE" };
+
+  return cache.getOrVerify(await tokenKey(token), async () => {
+    const payload = await getToken({
+      req: request,
+      secret: process.env.NEXTAUTH_SECRET,
+    });
+    return payload ? toSession(payload) : null;
+  });
+}
@@ -0,0 +1,43 @@
+// Small helpers for bounded fan-out from route handlers.
+
+export class TimeoutError extends Error {
+  constructor(ms) {
+    super(`Timed out after ${ms}ms`);
+    this.name = "TimeoutError";
+  }
+}
+
+// Reject with TimeoutError if promise has not settled within ms. The
+// underlying work is not cancelled, so a slow fetch can still fill the cache.
+export function withTimeout(promise, ms) {
+  let timer;
+  const timeout = new Promise((_, reject) => {
+    timer = setTimeout(() => reject(new TimeoutError(ms)), ms);
+  });
+  return Promise.race([promise, timeout]).finally(() => clearTimeout(timer));
+}
+
+// Like Promise.allSettled(items.map(fn)) with at most `limit` calls running
+// at once (a limit below 1 still runs one). Results keep the order of items.
+export async function mapWithConcurrency(items, limit, fn) {
+  const results = new Array(items.length);
+  let next = 0;
+
+  const worker = async () => {
+    while (next < items.length) {
+      const index = next++;
+      try {
+        results[index] = { status: "fulfilled", value: await fn(items[index], index) };
+      } catch (reason) {
+        results[index] = { status: "rejected", reason };
+      }
+    }
+  };
+
+  const workers = Array.from(
+    { length: Math.min(Math.max(1, limit), items.length) },
+    worker
+  );
+  await Promise.all(workers);
+  return results;
+}
@@ -0,0 +1,174 @@
+// Versioned change feed over the user-detail document.
+//
+// Apps Script only ever returns the whole document, so the proxy keeps the
+// last few versions of each rep's document in a normalized form and diffs
+// them on request. A version is the document's ETag (see gas-cache.js), so a
+// client that loaded /api/user can sync from that copy. Clients too far
+// behind, or whose delta would not be smaller, get the full snapshot.
+//
+// Normalized form:
+//   { wrapped, summary, sections: { breakdown, refundBreakdown } }
+// summary is the document with each section replaced by null; a section is
+// { months: [{ ...month, transactions: [ids] }], items: { id: transaction } }.
+//
+// Delta:
+//   { summary: { changed keys }, removed: [keys],
+//     sections: { name: { order: [month names], months: { changed months },
+//                         items: { added or changed transactions } } } }
+
+import { envInt } from "@/lib/gas-cache";
+
+export const SYNC_SECTIONS = ["breakdown", "refundBreakdown"];
+
+const same = (a, b) => a === b || JSON.stringify(a) === JSON.stringify(b);
+
+function itemId(transaction, month, index) {
+  return String(
+    transaction.transaction_id || transaction.refund_id || `${month}#${index}`
+  );
+}
+
+function normalizeSection(months = []) {
+  const items = {};
+  const normalized = months.map((month) => ({
+    ...month,
+    transactions: (month.transactions || []).map((transaction, index) => {
+      const id = itemId(transaction, month.month, index);
+      items[id] = transaction;
+      return id;
+    }),
+  }));
+  return { months: normalized, items };
+}
+
+// Normalized state of a FETCH_USER_DETAIL payload, or null for an empty one
+export function normalizeDetail(payload) {
+  const wrapped = Array.isArray(payload);
+  const detail = wrapped ? payload[0] : payload;
+  if (!detail || typeof detail !== "object") return null;
+
+  const summary = { ...detail };
+  const sections = {};
+  for (const name of SYNC_SECTIONS) {
+    if (Array.isArray(detail[name])) {
+      summary[name] = null;
+      sections[name] = normalizeSection(detail[name]);
+    }
+  }
+  return { wrapped, summary, sections };
+}
+
+export function denormalizeDetail(state) {
+  const detail = { ...state.summary };
+  for (const [name, section] of Object.entries(state.sections)) {
+    detail[name] = section.months.map((month) => ({
+      ...month,
+      transactions: month.transactions.map((id) => section.items[id]),
+    }));
+  }
+  return state.wrapped ? [detail] : detail;
+}
+
+function diffSection(previous = { months: [], items: {} }, next) {
+  const before = new Map(previous.months.map((month) => [month.month, month]));
+  const months = {};
+  for (const month of next.months) {
+    if (!same(before.get(month.month), month)) months[month.month] = month;
+  }
+
+  const items = {};
+  for (const [id, transaction] of Object.entries(next.items)) {
+    if (!same(previous.items[id], transaction)) items[id] = transaction;
+  }
+
+  const order = next.months.map((month) => month.month);
+  const unchanged =
+    !Object.keys(months).length &&
+    !Object.keys(items).length &&
+    same(order, previous.months.map((month) => month.month));
+  return unchanged ? null : { order, months, items };
+}
+
+// Changes that turn state previous into state next
+export function diffDetail(previous, next) {
+  const summary = {};
+  for (const [key, value] of Object.entries(next.summary)) {
+    if (!(key in previous.summary) || !same(previous.summary[key], value)) {
+      summary[key] = value;
+    }
+  }
+  const removed = Object.keys(previous.summary).filter(
+    (key) => !(key in next.summary)
+  );
+
+  const sections = {};
+  for (const [name, section] of Object.entries(next.sections)) {
+    const changes = diffSection(previous.sections[name], section);
+    if (changes) sections[name] = changes;
+  }
+  return { summary, removed, sections };
+}
+
+// Apply a delta from diffDetail to a normalized state, returning a new state
+export function applyDelta(state, delta) {
+  const summary = { ...state.summary, ...delta.summary };
+  for (const key of delta.removed) delete summary[key];
+
+  const sections = { ...state.sections };
+  for (const [name, changes] of Object.entries(delta.sections)) {
+    const previous = sections[name] || { months: [], items: {} };
+    const before = new Map(previous.months.map((month) => [month.month, month]));
+    const months = changes.order.map(
+      (month) => changes.months[month] || before.get(month)
+    );
+
+    // Keep only transactions still listed in a month
+    const merged = { ...previous.items, ...changes.items };
+    const items = {};
+    for (const month of months) {
+      for (const id of month.transactions) items[id] = merged[id];
+    }
+    sections[name] = { months, items };
+  }
+  for (const name of Object.keys(sections)) {
+    if (!(name in summary)) delete sections[name];
+  }
+  return { wrapped: state.wrapped, summary, sections };
+}
+
+// Last few normalized versions per key, with an LRU bound on keys
+export class VersionHistory {
+  constructor({ maxKeys = 500, maxVersions = 5 } = {}) {
+    this.maxKeys = maxKeys;
+    this.maxVersions = maxVersions;
+    this.keys = new Map();
+  }
+
+  // Remember payload as version (its ETag) unless it is already the newest
+  record(key, version, payload, watermark) {
+    const versions = this.keys.get(key) || [];
+    this.keys.delete(key);
+    this.keys.set(key, versions);
+
+    if (versions[versions.length - 1]?.version !== version) {
+      const state = normalizeDetail(payload);
+      if (state) versions.push({ version, watermark, state });
+      if (versions.length > this.maxVersions) versions.shift();
+    }
+
+    while (this.keys.size > this.maxKeys) {
+      this.keys.delete(this.keys.keys().next().value);
+    }
+    const newest = versions[versions.length - 1];
+    return newest?.version === version ? newest : null;
+  }
+
+  find(key, version) {
+    return (this.keys.get(key) || []).find((entry) => entry.version === version);
+  }
+}
+
+export const versionHistory = new VersionHistory({
+  maxKeys: envInt("DELTA_SYNC_MAX_KEYS", 500),
+  maxVersions: envInt("DELTA_SYNC_VERSIONS", 5),
+});
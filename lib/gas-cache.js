@@ -0,0 +1,175 @@
+// Bounded in-process cache for Google Apps Script responses.
+//
+// Entries live in a Map whose insertion order doubles as LRU order: a hit
+// re-inserts its key and eviction drops the first key. Concurrent misses for
+// the same key share one in-flight promise, so N simultaneous dashboard loads
+// cost a single upstream fetch. Past its TTL an entry is still served for a
+// stale window while one background load refreshes it. State is per server
+// process.
+//
+// Expired entries are not deleted until evicted: they remain the last good
+// copy, served by lastGood() when Apps Script is failing.
+//
+// Batch rep-detail lookups keep what they load in a separate batchCache, so a
+// single large batch cannot evict the working set of gasCache.
+
+import { createHash } from "crypto";
+
+const DEFAULT_MAX_ENTRIES = 500;
+const DEFAULT_BATCH_MAX_ENTRIES = 1000;
+
+export const envInt = (name, fallback) => {
+  const value = parseInt(process.env[name], 10);
+  return Number.isFinite(value) && value >= 0 ? value : fallback;
+};
+
+// Per-endpoint TTLs in ms; the roster changes far less often than rep detail
+export const GAS_CACHE_TTL = {
+  users: envInt("GAS_CACHE_TTL_USERS_MS", 5 * 60 * 1000),
+  user: envInt("GAS_CACHE_TTL_USER_MS", 60 * 1000),
+};
+
+// How long past its TTL an entry may be served while it is refreshed
+export const GAS_CACHE_STALE = {
+  users: envInt("GAS_CACHE_STALE_USERS_MS", 30 * 60 * 1000),
+  user: envInt("GAS_CACHE_STALE_USER_MS", 5 * 60 * 1000),
+};
+
+// Strong validator for a serialized body: same JSON, same ETag, on any process
+export function etagFor(body) {
+  return `"${createHash("sha1").update(body).digest("base64url")}"`;
+}
+
+export class GASCache {
+  constructor({ maxEntries = DEFAULT_MAX_ENTRIES } = {}) {
+    this.maxEntries = maxEntries;
+    this.entries = new Map();
+    this.inflight = new Map();
+    this.stats = {
+      hits: 0,
+      misses: 0,
+      coalesced: 0,
+      stale: 0,
+      refreshes: 0,
+      refreshErrors: 0,
+      fallbacks: 0,
+      evictions: 0,
+      expired: 0,
+    };
+  }
+
+  // Entry for key while it is fresh or within its stale window
+  get(key) {
+    const entry = this.entries.get(key);
+    if (!entry) return undefined;
+
+    if (entry.staleUntil <= Date.now()) {
+      this.stats.expired += 1;
+      return undefined;
+    }
+
+    // Refresh recency
+    this.entries.delete(key);
+    this.entries.set(key, entry);
+    return entry;
+  }
+
+  // Fresh entry for key, counted as a hit, without refreshing its recency
+  peek(key) {
+    const entry = this.entries.get(key);
+    if (!entry || entry.expiresAt <= Date.now()) return undefined;
+    this.stats.hits += 1;
+    return entry;
+  }
+
+  // Store value with its JSON body and ETag, computed once per upstream fetch
+  set(key, value, ttlMs, staleMs = 0) {
+    const now = Date.now();
+    const body = JSON.stringify(value);
+    const entry = {
+      value,
+      body,
+      etag: etagFor(body),
+      storedAt: now,
+      expiresAt: now + ttlMs,
+      staleUntil: now + ttlMs + staleMs,
+    };
+    this.entries.delete(key);
+    this.entries.set(key, entry);
+
+    while (this.entries.size > this.maxEntries) {
+      const oldest = this.entries.keys().next().value;
+      this.entries.delete(oldest);
+      this.stats.evictions += 1;
+    }
+    return entry;
+  }
+
+  // Most recent entry for key however old, for use when a reload failed
+  lastGood(key) {
+    const entry = this.entries.get(key);
+    if (entry) this.stats.fallbacks += 1;
+    return entry;
+  }
+
+  // Shared load of key; resolves to the stored entry
+  load(key, ttlMs, loader, staleMs) {
+    let promise = this.inflight.get(key);
+    if (!promise) {
+      promise = Promise.resolve()
+        .then(loader)
+        .then((value) => this.set(key, value, ttlMs, staleMs))
+        .finally(() => this.inflight.delete(key));
+      this.inflight.set(key, promise);
+    }
+    return promise;
+  }
+
+  // Resolve key from cache, an in-flight load, or a new call to loader().
+  // Returns the entry fields ({ value, body, etag, expiresAt, ... }) plus a
+  // status of HIT, STALE, COALESCED or MISS. A STALE entry starts a
+  // background refresh whose failure leaves the entry in place. Rejections
+  // are passed to every waiter and never cached.
+  async getOrLoad(key, ttlMs, loader, staleMs = 0) {
+    const entry = this.get(key);
+    if (entry && entry.expiresAt > Date.now()) {
+      this.stats.hits += 1;
+      return { ...entry, status: "HIT" };
+    }
+    if (entry) {
+      this.stats.stale += 1;
+      if (!this.inflight.has(key)) {
+        this.stats.refreshes += 1;
+        this.load(key, ttlMs, loader, staleMs).catch(() => {
+          this.stats.refreshErrors += 1;
+        });
+      }
+      return { ...entry, status: "STALE" };
+    }
+
+    if (this.inflight.has(key)) {
+      this.stats.coalesced += 1;
+      return { ...(await this.inflight.get(key)), status: "COALESCED" };
+    }
+
+    this.stats.misses += 1;
+    return { ...(await this.load(key, ttlMs, loader, staleMs)), status: "MISS" };
+  }
+
+  snapshot() {
+    return {
+      ...this.stats,
+      size: this.entries.size,
+      inflight: this.inflight.size,
+      maxEntries: this.maxEntries,
+    };
+  }
+}
+
+export const gasCache = new GASCache({
+  maxEntries: envInt("GAS_CACHE_MAX_ENTRIES", DEFAULT_MAX_ENTRIES),
+});
+
+export const batchCache = new GASCache({
+  maxEntries: envInt("GAS_BATCH_CACHE_MAX_ENTRIES", DEFAULT_BATCH_MAX_ENTRIES),
+});
@@ -0,0 +1,310 @@
+// Resilient client for the Google Apps Script deployments.
+//
+// Every call gets a per-endpoint deadline. When the first request has not
+// answered within the endpoint's recent p95 latency a second, hedged request
+// is fired and whichever succeeds first wins; the loser is aborted. A circuit
+// breaker per endpoint stops calling Apps Script after repeated failures and
+// lets a single probe through once the cooldown has passed. Non-2xx statuses
+// and non-JSON bodies (Apps Script reports script errors as 200 HTML pages)
+// count as failures. State is per server process.
+
+import { envInt } from "@/lib/gas-cache";
+
+const LATENCY_WINDOW = 200;
+const MIN_HEDGE_SAMPLES = 20;
+const MAX_TRANSITIONS = 20;
+
+export const GAS_DEADLINE_MS = {
+  users: envInt("GAS_DEADLINE_USERS_MS", 15000),
+  user: envInt("GAS_DEADLINE_USER_MS", 10000),
+};
+
+export class UpstreamError extends Error {
+  constructor(message, { endpoint, status } = {}) {
+    super(message);
+    this.name = "UpstreamError";
+    this.endpoint = endpoint;
+    this.status = status;
+  }
+}
+
+export class CircuitOpenError extends UpstreamError {
+  constructor(endpoint, retryInMs) {
+    super(`Circuit open for ${endpoint}; retry in ${Math.ceil(retryInMs / 1000)}s`, {
+      endpoint,
+    });
+    this.name = "CircuitOpenError";
+    this.retryInMs = retryInMs;
+  }
+}
+
+// Last LATENCY_WINDOW successful latencies of an endpoint
+class LatencyWindow {
+  constructor(size = LATENCY_WINDOW) {
+    this.size = size;
+    this.samples = [];
+    this.next = 0;
+  }
+
+  add(ms) {
+    if (this.samples.length < this.size) this.samples.push(ms);
+    else this.samples[this.next] = ms;
+    this.next = (this.next + 1) % this.size;
+  }
+
+  percentile(pct) {
+    if (!this.samples.length) return undefined;
+    const sorted = [...this.samples].sort((a, b) => a - b);
+    return sorted[Math.min(sorted.length - 1, Math.floor((pct / 100) * sorted.length))];
+  }
+}
+
+// CLOSED -> OPEN after failureThreshold consecutive failures; OPEN ->
+// HALF_OPEN once cooldownMs has passed, admitting one probe; the probe's
+// outcome closes or reopens the circuit
+export class CircuitBreaker {
+  constructor({ failureThreshold = 5, cooldownMs = 30000 } = {}) {
+    this.failureThreshold = failureThreshold;
+    this.cooldownMs = cooldownMs;
+    this.state = "CLOSED";
+    this.consecutiveFailures = 0;
+    this.openedAt = 0;
+    this.probing = false;
+    this.transitions = [];
+  }
+
+  transition(state) {
+    this.transitions.push({ from: this.state, to: state, at: Date.now() });
+    if (this.transitions.length > MAX_TRANSITIONS) this.transitions.shift();
+    this.state = state;
+  }
+
+  // Whether a request may go upstream now
+  allow() {
+    if (this.state === "OPEN" && Date.now() - this.openedAt >= this.cooldownMs) {
+      this.transition("HALF_OPEN");
+    }
+    if (this.state === "HALF_OPEN" && !this.probing) {
+      this.probing = true;
+      return true;
+    }
+    return this.state === "CLOSED";
+  }
+
+  retryInMs() {
+    return Math.max(0, this.openedAt + this.cooldownMs - Date.now());
+  }
+
+  success() {
+    this.consecutiveFailures = 0;
+    this.probing = false;
+    if (this.state !== "CLOSED") this.transition("CLOSED");
+  }
+
+  failure() {
+    this.consecutiveFailures += 1;
+    this.probing = false;
+    if (
+      this.state === "HALF_OPEN" ||
+      (this.state === "CLOSED" && this.consecutiveFailures >= this.failureThreshold)
+    ) {
+      this.openedAt = Date.now();
+      this.transition("OPEN");
+    }
+  }
+}
+
+export class GASClient {
+  constructor({
+    deadlines = {},
+    defaultDeadlineMs = 10000,
+    hedging = true,
+    hedgePercentile = 95,
+    hedgeMinDelayMs = 100,
+    hedgeDefaultDelayMs = 2000,
+    failureThreshold = 5,
+    cooldownMs = 30000,
+  } = {}) {
+    this.deadlines = deadlines;
+    this.defaultDeadlineMs = defaultDeadlineMs;
+    this.hedging = hedging;
+    this.hedgePercentile = hedgePercentile;
+    this.hedgeMinDelayMs = hedgeMinDelayMs;
+    this.hedgeDefaultDelayMs = hedgeDefaultDelayMs;
+    this.breakerOptions = { failureThreshold, cooldownMs };
+    this.endpoints = new Map();
+  }
+
+  endpoint(name) {
+    let state = this.endpoints.get(name);
+    if (!state) {
+      state = {
+        latency: new LatencyWindow(),
+        breaker: new CircuitBreaker(this.breakerOptions),
+        stats: {
+          calls: 0,
+          requests: 0,
+          successes: 0,
+          failures: 0,
+          timeouts: 0,
+          rejected: 0,
+          hedgesFired: 0,
+          hedgesWon: 0,
+        },
+      };
+      this.endpoints.set(name, state);
+    }
+    return state;
+  }
+
+  // Delay before the hedged request: the endpoint's recent p95, once known
+  hedgeDelay(state) {
+    if (state.latency.samples.length < MIN_HEDGE_SAMPLES) return this.hedgeDefaultDelayMs;
+    return Math.max(this.hedgeMinDelayMs, state.latency.percentile(this.hedgePercentile));
+  }
+
+  // One request: resolves to { data, parseMs }, parseMs being the time spent
+  // reading and parsing the body after the headers arrived
+  async attempt(url, name, signal) {
+    const response = await fetch(url, { signal, cache: "no-store" });
+    if (!response.ok) {
+      throw new UpstreamError(`Apps Script returned ${response.status}`, {
+        endpoint: name,
+        status: response.status,
+      });
+    }
+    const parseStart = performance.now();
+    try {
+      const data = await response.json();
+      return { data, parseMs: performance.now() - parseStart };
+    } catch (error) {
+      if (signal.aborted) throw error;
+      throw new UpstreamError("Apps Script returned a non-JSON response", {
+        endpoint: name,
+        status: response.status,
+      });
+    }
+  }
+
+  // GET url as JSON for endpoint name. Resolves to { data, parseMs, hedged,
+  // winner } or rejects with UpstreamError / CircuitOpenError.
+  async fetchJSON(url, name) {
+    const state = this.endpoint(name);
+    const { breaker, stats } = state;
+    stats.calls += 1;
+    if (!breaker.allow()) {
+      stats.rejected += 1;
+      throw new CircuitOpenError(name, breaker.retryInMs());
+    }
+
+    const deadline = this.deadlines[name] ?? this.defaultDeadlineMs;
+    const controllers = [];
+    const timers = [];
+    const started = performance.now();
+
+    const launch = (index) => {
+      const controller = new AbortController();
+      controllers.push(controller);
+      stats.requests += 1;
+      return this.attempt(url, name, controller.signal).then((result) => ({
+        ...result,
+        index,
+      }));
+    };
+
+    try {
+      const result = await new Promise((resolve, reject) => {
+        // Fail once every launched attempt has failed; a first attempt that
+        // fails before the hedge delay is not retried
+        let pending = 0;
+        const settle = (promise) => {
+          pending += 1;
+          promise.then(resolve, (error) => {
+            pending -= 1;
+            if (pending === 0) reject(error);
+          });
+        };
+
+        timers.push(
+          setTimeout(() => {
+            stats.timeouts += 1;
+            reject(
+              new UpstreamError(`Apps Script timed out after ${deadline}ms`, {
+                endpoint: name,
+              })
+            );
+          }, deadline)
+        );
+        // A half-open probe stays a single request
+        if (this.hedging && breaker.state === "CLOSED") {
+          timers.push(
+            setTimeout(() => {
+              if (pending === 0) return;
+              stats.hedgesFired += 1;
+              settle(launch(1));
+            }, this.hedgeDelay(state))
+          );
+        }
+        settle(launch(0));
+      });
+
+      stats.successes += 1;
+      if (result.index === 1) stats.hedgesWon += 1;
+      // Time since the first attempt started: its latency, or a lower bound
+      // of it when the hedge won, so hedging does not drag the p95 down
+      state.latency.add(performance.now() - started);
+      breaker.success();
+      return {
+        data: result.data,
+        parseMs: result.parseMs,
+        hedged: controllers.length > 1,
+        winner: result.index,
+      };
+    } catch (error) {
+      stats.failures += 1;
+      breaker.failure();
+      throw error instanceof UpstreamError
+        ? error
+        : new UpstreamError(error.message, { endpoint: name });
+    } finally {
+      timers.forEach(clearTimeout);
+      controllers.forEach((controller) => controller.abort());
+    }
+  }
+
+  snapshot() {
+    const endpoints = {};
+    for (const [name, state] of this.endpoints) {
+      const p50 = state.latency.percentile(50);
+      const p95 = state.latency.percentile(95);
+      endpoints[name] = {
+        ...state.stats,
+        latencyMs: {
+          p50: p50 && Math.round(p50),
+          p95: p95 && Math.round(p95),
+          samples: state.latency.samples.length,
+        },
+        hedgeDelayMs: this.hedging ? Math.round(this.hedgeDelay(state)) : null,
+        deadlineMs: this.deadlines[name] ?? this.defaultDeadlineMs,
+        breaker: {
+          state: state.breaker.state,
+          consecutiveFailures: state.breaker.consecutiveFailures,
+          retryInMs: state.breaker.state === "OPEN" ? state.breaker.retryInMs() : 0,
+          cooldownMs: state.breaker.cooldownMs,
+          failureThreshold: state.breaker.failureThreshold,
+          transitions: state.breaker.transitions,
+        },
+      };
+    }
+    return endpoints;
+  }
+}
+
+export const gasClient = new GASClient({
+  deadlines: GAS_DEADLINE_MS,
+  hedging: envInt("GAS_HEDGE", 1) !== 0,
+  hedgeMinDelayMs: envInt("GAS_HEDGE_MIN_DELAY_MS", 100),
+  hedgeDefaultDelayMs: envInt("GAS_HEDGE_DEFAULT_DELAY_MS", 2000),
+  failureThreshold: envInt("GAS_BREAKER_FAILURES", 5),
+  cooldownMs: envInt("GAS_BREAKER_COOLDOWN_MS", 30000),
+});
@@ -0,0 +1,42 @@
+// Reads the per-cycle leaderboard snapshots written by leaderboard_snapshot.py.
+//
+// LEADERBOARD_SNAPSHOT_DIR holds index.json and one <cycle_id>.json per
+// cycle. Parsed files are kept per path and reused until their mtime changes,
+// so a request costs one stat() while the snapshot is unchanged.
+
+import { readFile, stat } from "fs/promises";
+import path from "path";
+
+export const LEADERBOARD_SNAPSHOT_DIR = process.env.LEADERBOARD_SNAPSHOT_DIR;
+
+const CYCLE_ID = /^[A-Za-z0-9_-]+$/;
+const parsed = new Map();
+
+async function readJSON(file) {
+  let info;
+  try {
+    info = await stat(file);
+  } catch (error) {
+    if (error.code === "ENOENT") return null;
+    throw error;
+  }
+
+  const cached = parsed.get(file);
+  if (cached && cached.mtimeMs === info.mtimeMs) return cached.data;
+
+  const data = JSON.parse(await readFile(file, "utf8"));
+  parsed.set(file, { mtimeMs: info.mtimeMs, data });
+  return data;
+}
+
+// Snapshot for cycleId, or for the latest cycle when none is given.
+// Returns null when there is no snapshot for the cycle.
+export async function readLeaderboardSnapshot(cycleId, dir = LEADERBOARD_SNAPSHOT_DIR) {
+  if (!cycleId) {
+    const index = await readJSON(path.join(dir, "index.json"));
+    cycleId = index?.latest_cycle;
+    if (!cycleId) return null;
+  }
+  if (!CYCLE_ID.test(cycleId)) return null;
+  return readJSON(path.join(dir, `${cycleId}.json`));
+}
@@ -0,0 +1,178 @@
+// Flattened, cursor-paginated views of the log lists in a user-detail payload.
+//
+// Items are ordered newest first by (date, id). A cursor is the (date, id)
+// of the last item of a page, so pages stay stable however many items a rep
+// has and a page is found by binary search instead of an offset scan.
+// Items without an upstream id get one derived from their content, so ids
+// do not shift when rows are added upstream.
+
+import { createHash } from "crypto";
+
+export const LOG_TYPES = ["sales", "refunds", "activity"];
+
+// Sorted item lists per payload object; cached payloads are reused between
+// requests, so this is built once per upstream fetch and collected with it
+const flattened = new WeakMap();
+
+function transactionsOf(months = []) {
+  return months.flatMap((month) =>
+    (month.transactions || []).map((transaction) => ({
+      ...transaction,
+      month: month.month,
+    }))
+  );
+}
+
+// "2025-09-06 | 400 pts Closure Won (Lead #LB)" -> { date, points, description }
+function parseReward(reward) {
+  const [date = "", text = ""] = String(reward).split(" | ");
+  const points = parseFloat(text.split(" ")[0]);
+  return {
+    date,
+    points: Number.isFinite(points) ? points : 0,
+    description: text.replace(/^\S+\s+pts\s+/, ""),
+  };
+}
+
+function itemsOf(detail, type) {
+  switch (type) {
+    case "sales":
+      return transactionsOf(detail.breakdown);
+    case "refunds":
+      return transactionsOf(detail.refundBreakdown);
+    case "activity":
+      return (detail.rewards || []).map(parseReward);
+    default:
+      return [];
+  }
+}
+
+// Items need an id for a stable cursor. Without a transaction, refund or
+// activity id it is a hash of the item's content; identical items (which
+// only differ by position) are told apart by a counter. `seen` counts the
+// content hashes of one list.
+function withId(item, seen) {
+  const id = item.transaction_id || item.refund_id || item.activity_id;
+  if (id) return { ...item, id: String(id) };
+
+  const digest = createHash("sha1")
+    .update(
+      JSON.stringify([
+        item.date,
+        item.lead_id ?? "",
+        item.amount ?? item.points ?? "",
+        item.client ?? "",
+        item.description ?? item.reason ?? "",
+      ])
+    )
+    .digest("base64url")
+    .slice(0, 16);
+  const count = seen.get(digest) || 0;
+  seen.set(digest, count + 1);
+  return { ...item, id: count ? `${digest}~${count}` : digest };
+}
+
+function compareItems(a, b) {
+  if (a.date !== b.date) return a.date < b.date ? 1 : -1;
+  if (a.id !== b.id) return a.id < b.id ? 1 : -1;
+  return 0;
+}
+
+export function flattenLogs(payload, type) {
+  const detail = Array.isArray(payload) ? payload[0] : payload;
+  if (!detail || typeof detail !== "object") return [];
+
+  let byType = flattened.get(detail);
+  if (!byType) {
+    byType = {};
+    flattened.set(detail, byType);
+  }
+  if (!byType[type]) {
+    const seen = new Map();
+    byType[type] = itemsOf(detail, type)
+      .map((item) => withId({ ...item, date: String(item.date || "") }, seen))
+      .sort(compareItems);
+  }
+  return byType[type];
+}
+
+// Totals of a log for its first page: item count, amount (points for
+// activity) and the same per month, newest month first. Cached per item list
+// like the lists themselves.
+const summaries = new WeakMap();
+
+export function summarizeLogs(items) {
+  let summary = summaries.get(items);
+  if (summary) return summary;
+
+  const months = new Map();
+  let amount = 0;
+  for (const item of items) {
+    const value = Number(item.amount ?? item.points) || 0;
+    amount += value;
+    if (!item.month) continue;
+    const month = months.get(item.month) || { month: item.month, total: 0, count: 0 };
+    month.total += value;
+    month.count += 1;
+    months.set(item.month, month);
+  }
+  summary = { count: items.length, amount, months: [...months.values()] };
+  summaries.set(items, summary);
+  return summary;
+}
+
+export function encodeCursor(item) {
+  return Buffer.from(JSON.stringify([item.date, item.id])).toString("base64url");
+}
+
+export function decodeCursor(cursor) {
+  try {
+    const [date, id] = JSON.parse(Buffer.from(cursor, "base64url").toString());
+    if (typeof date === "string" && typeof id === "string") return { date, id };
+  } catch (error) {
+    // fall through
+  }
+  return null;
+}
+
+// Index of the first item after the cursor position
+function startIndex(items, cursor) {
+  let low = 0;
+  let high = items.length;
+  while (low < high) {
+    const mid = (low + high) >> 1;
+    if (compareItems(items[mid], cursor) <= 0) low = mid + 1;
+    else high = mid;
+  }
+  return low;
+}
+
+export function paginate(items, cursor, limit) {
+  const start = cursor ? startIndex(items, cursor) : 0;
+  const page = items.slice(start, start + limit);
+  const hasMore = start + limit < items.length;
+  return {
+    items: page,
+    nextCursor: hasMore && page.length ? encodeCursor(page[page.length - 1]) : null,
+    total: items.length,
+  };
+}
+
+// Stream items as newline-delimited JSON, a chunk of lines per pull
+export function ndjsonStream(items, chunkSize = 500) {
+  const encoder = new TextEncoder();
+  let index = 0;
+  return new ReadableStream({
+    pull(controller) {
+      if (index >= items.length) {
+        controller.close();
+        return;
+      }
+      const chunk = items.slice(index, index + chunkSize);
+      index += chunk.length;
+      controller.enqueue(
+        encoder.encode(chunk.map((item) => JSON.stringify(item)).join("\n") + "\n")
+      );
+    },
+  });
+}
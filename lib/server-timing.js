@@ -0,0 +1,58 @@
+// Collects per-phase durations for a request and renders them as a
+// Server-Timing header, e.g. `auth;dur=3.2, upstream;dur=812.4, cache;desc="MISS"`.
+
+export class ServerTiming {
+  constructor() {
+    this.started = performance.now();
+    this.entries = [];
+  }
+
+  add(name, duration, description) {
+    this.entries.push({ name, duration, description });
+  }
+
+  // Await fn() and record how long it took under name
+  async time(name, fn) {
+    const start = performance.now();
+    try {
+      return await fn();
+    } finally {
+      this.add(name, performance.now() - start);
+    }
+  }
+
+  timeSync(name, fn) {
+    const start = performance.now();
+    try {
+      return fn();
+    } finally {
+      this.add(name, performance.now() - start);
+    }
+  }
+
+  header() {
+    const entries = [
+      ...this.entries,
+      { name: "total", duration: performance.now() - this.started },
+    ];
+    return entries
+      .map(({ name, duration, description }) => {
+        let value = name;
+        if (duration !== undefined) value += `;dur=${duration.toFixed(1)}`;
+        if (description) value += `;desc="${description}"`;
+        return value;
+      })
+      .join(", ");
+  }
+
+  // Set the header on a response and return it
+  apply(response) {
+    response.headers.set("Server-Timing", this.header());
+    return response;
+  }
+}
+
+// Time fn() when a ServerTiming is given, otherwise just run it
+export async function measure(timing, name, fn) {
+  return timing ? timing.time(name, fn) : fn();
+}
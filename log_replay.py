@@ -0,0 +1,327 @@
+#!/usr/bin/env python3
+"""
+Access-log replay against a deployment
+Re-issues the GET requests of a Next/edge access log against a target at the
+original pace, a multiple of it, or as fast as possible, then compares the
+replayed statuses and latencies with the recorded ones per path.
+
+Requests of one user (the log's user field, else the client IP) are replayed
+in their original order: a user's next request starts once the previous one
+has answered, as in a browser tab. Requests are otherwise issued at their
+original offset from the first request divided by --speed; the time a request
+waited past that offset is reported as schedule lag.
+
+Accepted log lines, mixed freely:
+  JSON lines with timestamp (ISO 8601 or epoch s/ms), path (query string
+  included or in a separate query field), status, and optionally method,
+  user or clientIp, and latency (duration/latency_ms in ms, request_time or
+  response_time in s). Fields nested under "proxy" (Vercel log drains) are
+  read too.
+  Common/combined log format, optionally followed by the request time in
+  seconds (nginx $request_time).
+
+Replay a log at twice the recorded speed:
+    python log_replay.py access.log --base-url http://localhost:3000 --speed 2
+"""
+
+import argparse
+import json
+import re
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from urllib.parse import urlencode
+
+from http_timing import TimedSession
+from latency_stats import latency_summary
+
+CLF = re.compile(
+    r'(?P<ip>\S+) \S+ (?P<user>\S+) \[(?P<time>[^\]]+)\] '
+    r'"(?P<method>[A-Z]+) (?P<target>\S+)[^"]*" (?P<status>\d{3}) \S+'
+    r'(?: "[^"]*" "[^"]*")?(?: (?P<request_time>\d+(?:\.\d+)?))?')
+
+# Never replayed: sign-in callbacks would fail or, worse, succeed
+SKIPPED_PREFIXES = ('/api/auth',)
+
+def parse_timestamp(value):
+    """Epoch seconds from ISO 8601, CLF time, or epoch seconds/milliseconds"""
+    if isinstance(value, (int, float)):
+        return value / 1000 if value > 1e11 else float(value)
+    value = str(value).strip()
+    if re.fullmatch(r'\d+(\.\d+)?', value):
+        return parse_timestamp(float(value))
+    try:
+        return datetime.strptime(value, '%d/%b/%Y:%H:%M:%S %z').timestamp()
+    except ValueError:
+        pass
+    parsed = datetime.fromisoformat(value.replace('Z', '+00:00'))
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed.timestamp()
+
+def _first(record, *keys):
+    for key in keys:
+        if record.get(key) not in (None, ''):
+            return record[key]
+    return None
+
+def parse_json_line(record):
+    record = dict(record, **record.get('proxy', {})) if isinstance(record.get('proxy'), dict) else record
+    timestamp = _first(record, 'timestamp', 'time', 'ts', 'date')
+    target = _first(record, 'path', 'requestPath', 'url', 'pathname')
+    if timestamp is None or target is None:
+        return None
+
+    path, _, query = str(target).partition('?')
+    extra = record.get('query') or record.get('search')
+    if isinstance(extra, dict):
+        extra = urlencode(extra, doseq=True)
+    if extra:
+        query = '&'.join(part for part in (query, str(extra).lstrip('?')) if part)
+
+    latency = None
+    milliseconds = _first(record, 'duration', 'duration_ms', 'latency_ms')
+    seconds = _first(record, 'request_time', 'response_time')
+    if milliseconds is not None:
+        latency = float(milliseconds) / 1000
+    elif seconds is not None:
+        latency = float(seconds)
+
+    status = _first(record, 'status', 'statusCode', 'status_code')
+    return {
+        'timestamp': parse_timestamp(timestamp),
+        'method': str(_first(record, 'method') or 'GET').upper(),
+        'path': path,
+        'query': query,
+        'status': int(status) if status is not None else None,
+        'latency': latency,
+        'user': str(_first(record, 'user', 'userId', 'email', 'clientIp', 'ip') or '-'),
+    }
+
+def parse_clf_line(line):
+    match = CLF.match(line)
+    if not match:
+        return None
+    path, _, query = match['target'].partition('?')
+    return {
+        'timestamp': parse_timestamp(match['time']),
+        'method': match['method'],
+        'path': path,
+        'query': query,
+        'status': int(match['status']),
+        'latency': float(match['request_time']) if match['request_time'] else None,
+        'user': match['user'] if match['user'] != '-' else match['ip'],
+    }
+
+def parse_line(line):
+    """Event dict for one log line, or None when the line is not a request"""
+    line = line.strip()
+    if not line:
+        return None
+    if line.startswith('{'):
+        try:
+            return parse_json_line(json.loads(line))
+        except (ValueError, TypeError):
+            return None
+    try:
+        return parse_clf_line(line)
+    except ValueError:
+        return None
+
+def load_events(paths, prefixes=None, limit=None):
+    """Replayable events of the given logs in timestamp order, and skip counts"""
+    events, skipped = [], {'unparsed': 0, 'method': 0, 'auth': 0, 'filtered': 0}
+    for path in paths:
+        with open(path, encoding='utf-8', errors='replace') as f:
+            for line in f:
+                event = parse_line(line)
+                if event is None:
+                    skipped['unparsed'] += bool(line.strip())
+                elif event['method'] not in ('GET', 'HEAD'):
+                    skipped['method'] += 1  # bodies are not logged
+                elif event['path'].startswith(SKIPPED_PREFIXES):
+                    skipped['auth'] += 1
+                elif prefixes and not event['path'].startswith(tuple(prefixes)):
+                    skipped['filtered'] += 1
+                else:
+                    events.append(event)
+    events.sort(key=lambda event: event['timestamp'])
+    return events[:limit] if limit else events, skipped
+
+class Replayer:
+    """Replay events against base_url, keeping each user's requests in order"""
+
+    def __init__(self, base_url, events, speed=1.0, concurrency=32, headers=None, timeout=30):
+        self.base_url = base_url.rstrip('/')
+        self.events = events
+        self.speed = speed
+        self.concurrency = max(1, concurrency)
+        self.headers = headers or {}
+        self.timeout = timeout
+        self.http = TimedSession(pool_size=self.concurrency, max_timings=1)
+        self.results = []
+        self._lock = threading.Lock()
+        self._pending = {}
+
+    def _issue(self, event, due):
+        sent = time.perf_counter()
+        status, error = None, None
+        url = f"{self.base_url}{event['path']}" + (f"?{event['query']}" if event['query'] else '')
+        try:
+            response = self.http.request(event['method'], url, headers=self.headers,
+                                         timeout=self.timeout, allow_redirects=False)
+            status = response.status_code
+        except Exception as e:
+            error = type(e).__name__
+        finished = time.perf_counter()
+        return {
+            'path': event['path'],
+            'user': event['user'],
+            'recorded_status': event['status'],
+            'recorded_latency': event['latency'],
+            'status': status,
+            'error': error,
+            'latency': finished - sent,
+            'lag': max(0.0, sent - due),
+        }
+
+    def _run_user(self, user, event, due):
+        """Replay event, then whatever of user's requests queued up behind it"""
+        while True:
+            result = self._issue(event, due)
+            with self._lock:
+                self.results.append(result)
+                queue = self._pending[user]
+                if not queue:
+                    del self._pending[user]
+                    return
+                event, due = queue.popleft()
+
+    def run(self):
+        if not self.events:
+            return self.report(0.0)
+        first = self.events[0]['timestamp']
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=self.concurrency) as pool:
+            for event in self.events:
+                due = start + (event['timestamp'] - first) / self.speed if self.speed else start
+                delay = due - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+                with self._lock:
+                    # A user with a request in flight gets this one queued behind it
+                    if event['user'] in self._pending:
+                        self._pending[event['user']].append((event, due))
+                        continue
+                    self._pending[event['user']] = deque()
+                pool.submit(self._run_user, event['user'], event, due)
+        return self.report(time.perf_counter() - start)
+
+    def report(self, elapsed):
+        def summarize(results):
+            mismatches = {}
+            for r in results:
+                replayed = r['status'] if r['status'] is not None else r['error']
+                if r['recorded_status'] is not None and replayed != r['recorded_status']:
+                    key = f"{r['recorded_status']} -> {replayed}"
+                    mismatches[key] = mismatches.get(key, 0) + 1
+            compared = [r for r in results if r['recorded_status'] is not None]
+            mismatched = sum(mismatches.values())
+            recorded = [r['recorded_latency'] for r in results if r['recorded_latency'] is not None]
+            return {
+                'requests': len(results),
+                'errors': sum(1 for r in results if r['error']),
+                'status_mismatches': mismatched,
+                'status_mismatch_rate': round(mismatched / len(compared), 4) if compared else 0.0,
+                'mismatches': dict(sorted(mismatches.items(), key=lambda item: -item[1])),
+                'recorded_latency_ms': latency_summary(recorded),
+                'replayed_latency_ms': latency_summary([r['latency'] for r in results]),
+            }
+
+        paths = {}
+        for result in self.results:
+            paths.setdefault(result['path'], []).append(result)
+        span = self.events[-1]['timestamp'] - self.events[0]['timestamp'] if self.events else 0.0
+        return {
+            'target': self.base_url,
+            'config': {'speed': self.speed or 'max', 'concurrency': self.concurrency},
+            'recorded_span_s': round(span, 3),
+            'elapsed': round(elapsed, 3),
+            'users': len({event['user'] for event in self.events}),
+            'schedule_lag_ms': latency_summary([r['lag'] for r in self.results]),
+            'paths': {path: summarize(results) for path, results in
+                      sorted(paths.items(), key=lambda item: -len(item[1]))},
+            'overall': summarize(self.results),
+        }
+
+def print_report(report, skipped, top=15):
+    print("=" * 60)
+    print("🔁 ACCESS LOG REPLAY")
+    print("=" * 60)
+    print(f"Target: {report['target']}  speed: {report['config']['speed']}  "
+          f"recorded span: {report['recorded_span_s']:.1f}s  replayed in: {report['elapsed']:.1f}s  "
+          f"users: {report['users']}")
+    print(f"Skipped lines: {skipped}  schedule lag p99: {report['schedule_lag_ms']['p99']}ms")
+    header = (f"{'path':<28}{'reqs':>7}{'rec p50':>9}{'rec p95':>9}{'new p50':>9}{'new p95':>9}"
+              f"{'status≠':>9}")
+    print(header)
+    print("-" * len(header))
+    rows = list(report['paths'].items())[:top] + [('overall', report['overall'])]
+    for path, stats in rows:
+        cells = ''.join(
+            f"{value:>9.1f}" if value is not None else f"{'-':>9}"
+            for value in (stats['recorded_latency_ms']['p50'], stats['recorded_latency_ms']['p95'],
+                          stats['replayed_latency_ms']['p50'], stats['replayed_latency_ms']['p95']))
+        print(f"{path[:27]:<28}{stats['requests']:>7}{cells}{stats['status_mismatch_rate'] * 100:>8.1f}%")
+    print("(latencies in ms; status≠ is the share answering with a different status than recorded)")
+    for path, stats in rows:
+        if stats['mismatches'] and path != 'overall':
+            print(f"   {path}: {', '.join(f'{key} x{count}' for key, count in stats['mismatches'].items())}")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Replay an access log against a deployment")
+    parser.add_argument("logs", nargs='+', help="Access log files (JSON lines or common/combined format)")
+    parser.add_argument("--base-url", default="http://localhost:3000",
+                        help="Deployment to replay against (default: http://localhost:3000)")
+    parser.add_argument("--cookie",
+                        help="Cookie header sent with every request, e.g. 'next-auth.session-token=...'")
+    parser.add_argument("--speed", type=float, default=1.0,
+                        help="Replay speed: 1 keeps the recorded gaps, 2 halves them, 0 is as fast "
+                             "as --concurrency allows (default: 1)")
+    parser.add_argument("--concurrency", type=int, default=32,
+                        help="Most requests in flight at once (default: 32)")
+    parser.add_argument("--path", action="append", dest="prefixes",
+                        help="Only replay paths starting with this prefix, repeatable")
+    parser.add_argument("--limit", type=int, help="Replay only the first N requests")
+    parser.add_argument("--max-status-mismatch", type=float, default=0.01,
+                        help="Fail when more than this share of requests changes status (default: 0.01)")
+    parser.add_argument("--report", default="replay_report.json",
+                        help="Path of the JSON report (default: replay_report.json)")
+    args = parser.parse_args(argv)
+
+    events, skipped = load_events(args.logs, args.prefixes, args.limit)
+    if not events:
+        print(f"❌ No replayable requests in {', '.join(args.logs)} (skipped: {skipped})")
+        return 1
+    print(f"🔁 Replaying {len(events)} requests against {args.base_url}...")
+    replayer = Replayer(args.base_url, events, speed=args.speed, concurrency=args.concurrency,
+                        headers={'Cookie': args.cookie} if args.cookie else None)
+    report = replayer.run()
+    report['skipped'] = skipped
+    print_report(report, skipped)
+
+    with open(args.report, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"Report written to {args.report}")
+
+    rate = report['overall']['status_mismatch_rate']
+    if rate > args.max_status_mismatch:
+        print(f"❌ {rate * 100:.1f}% of replayed requests changed status")
+        return 1
+    print("✅ Replayed statuses match the log")
+    return 0
+
+if __name__ == "__main__":
+    exit(main())
@@ -1,5 +1,5 @@
 import { NextResponse } from "next/server";
-import { getToken } from "next-auth/jwt";
+import { verifySession } from "@/lib/auth";
 
 export async function middleware(request) {
   const { pathname } = request.nextUrl;
@@ -34,34 +34,29 @@ export async function middleware(request) {
   }
 
   try {
-    const token = await getToken({
-      req: request,
-      secret: process.env.NEXTAUTH_SECRET,
-    });
+    // Verified once per token and cached, see lib/auth.js
+    const start = performance.now();
+    const { session, status } = await verifySession(request);
+    const timing = `auth;dur=${(performance.now() - start).toFixed(1)};desc="${status}"`;
+    const withTiming = (response) => {
+      response.headers.set("Server-Timing", timing);
+      return response;
+    };
 
     // If no token, redirect to home for sign-in
-    if (!token) {
+    if (!session) {
       const url = new URL("/", request.url);
-      return NextResponse.redirect(url);
+      return withTiming(NextResponse.redirect(url));
     }
 
     // Check if user email is from allowed domains
-    if (token.email) {
-      const allowedDomains = process.env.ALLOWED_GOOGLE_WORKSPACE_DOMAIN?.split(
-        ","
-      ).map((d) => d.trim()) || ["cronberry.com"];
-      const isAllowed = allowedDomains.some((domain) =>
-        token.email.endsWith(`@${domain}`)
-      );
-
-      if (!isAllowed) {
-        const url = new URL("/auth/error", request.url);
-        url.searchParams.set("error", "AccessDenied");
-        return NextResponse.redirect(url);
-      }
+    if (!session.allowed) {
+      const url = new URL("/auth/error", request.url);
+      url.searchParams.set("error", "AccessDenied");
+      return withTiming(NextResponse.redirect(url));
     }
 
-    return NextResponse.next();
+    return withTiming(NextResponse.next());
   } catch (error) {
     console.error("Middleware error:", error);
     // On error, redirect to home
@@ -0,0 +1,208 @@
+#!/usr/bin/env python3
+"""
+Latency history and regression gate for backend_test.py
+Each tester run stores the median and p95 of every metric (e.g. "GET
+/api/user") in a SQLite file, keyed by commit, environment (the deployment
+tested) and mode (checks, or a benchmark configuration). A run is compared
+with the rolling baseline of the previous passing runs of the same
+environment and mode: a metric regresses when its median or p95 exceeds the
+baseline median of that statistic by more than the noise tolerance, the
+largest of a relative tolerance, three robust standard deviations (1.4826 *
+MAD) of the baseline runs, and an absolute floor.
+
+List recent runs of a history file:
+    python perf_history.py --history perf_history.sqlite3
+"""
+
+import argparse
+import os
+import sqlite3
+import statistics
+import subprocess
+from datetime import datetime, timezone
+
+DEFAULT_PATH = 'perf_history.sqlite3'
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    started_at TEXT NOT NULL,
+    commit_sha TEXT NOT NULL,
+    environment TEXT NOT NULL,
+    mode TEXT NOT NULL,
+    passed INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS runs_by_key ON runs (environment, mode, id);
+CREATE TABLE IF NOT EXISTS metrics (
+    run_id INTEGER NOT NULL REFERENCES runs (id),
+    name TEXT NOT NULL,
+    count INTEGER NOT NULL,
+    median_ms REAL NOT NULL,
+    p95_ms REAL NOT NULL,
+    PRIMARY KEY (run_id, name)
+);
+"""
+
+STATS = ('median_ms', 'p95_ms')
+
+def current_commit():
+    """Short SHA of the checkout this script lives in, else a CI variable, else 'unknown'"""
+    try:
+        result = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True,
+                                text=True, timeout=5,
+                                cwd=os.path.dirname(os.path.abspath(__file__)))
+        if result.returncode == 0 and result.stdout.strip():
+            return result.stdout.strip()
+    except (OSError, subprocess.SubprocessError):
+        pass
+    return os.environ.get('GIT_COMMIT') or os.environ.get('VERCEL_GIT_COMMIT_SHA') or 'unknown'
+
+def summarize(samples):
+    """count, median and p95 (ms) of latencies in seconds"""
+    ordered = sorted(samples)
+    p95 = statistics.quantiles(ordered, n=20, method='inclusive')[18] if len(ordered) > 1 else ordered[0]
+    return {
+        'count': len(ordered),
+        'median_ms': round(statistics.median(ordered) * 1000, 3),
+        'p95_ms': round(p95 * 1000, 3),
+    }
+
+class PerfHistory:
+    """SQLite store of per-run latency summaries"""
+
+    def __init__(self, path=DEFAULT_PATH):
+        self.path = path
+        self.db = sqlite3.connect(path)
+        self.db.row_factory = sqlite3.Row
+        self.db.executescript(SCHEMA)
+
+    def close(self):
+        self.db.close()
+
+    def record(self, commit, environment, mode, metrics, passed=True):
+        """Store a run's {name: [seconds]} samples; returns the run id"""
+        with self.db:
+            run_id = self.db.execute(
+                "INSERT INTO runs (started_at, commit_sha, environment, mode, passed) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (datetime.now(timezone.utc).isoformat(), commit, environment, mode,
+                 int(bool(passed)))).lastrowid
+            self.db.executemany(
+                "INSERT INTO metrics (run_id, name, count, median_ms, p95_ms) "
+                "VALUES (?, ?, ?, ?, ?)",
+                [(run_id, name, stats['count'], stats['median_ms'], stats['p95_ms'])
+                 for name, stats in ((name, summarize(samples))
+                                     for name, samples in metrics.items() if samples)])
+        return run_id
+
+    def baseline(self, environment, mode, runs=10, before=None):
+        """Summaries of the last `runs` passing runs, oldest first: [{name: stats}]"""
+        query = "SELECT id FROM runs WHERE environment = ? AND mode = ? AND passed = 1"
+        params = [environment, mode]
+        if before is not None:
+            query += " AND id < ?"
+            params.append(before)
+        run_ids = [row['id'] for row in self.db.execute(
+            query + " ORDER BY id DESC LIMIT ?", params + [runs])]
+
+        summaries = {run_id: {} for run_id in run_ids}
+        if run_ids:
+            placeholders = ','.join('?' * len(run_ids))
+            for row in self.db.execute(
+                    f"SELECT * FROM metrics WHERE run_id IN ({placeholders})", run_ids):
+                summaries[row['run_id']][row['name']] = {
+                    'count': row['count'], 'median_ms': row['median_ms'], 'p95_ms': row['p95_ms']}
+        return [summaries[run_id] for run_id in reversed(run_ids)]
+
+    def recent_runs(self, environment=None, mode=None, limit=20):
+        """Latest runs, newest first, each with its metric summaries"""
+        query, params = "SELECT * FROM runs WHERE 1 = 1", []
+        if environment:
+            query += " AND environment = ?"
+            params.append(environment)
+        if mode:
+            query += " AND mode = ?"
+            params.append(mode)
+        runs = [dict(row) for row in self.db.execute(query + " ORDER BY id DESC LIMIT ?",
+                                                     params + [limit])]
+        for run in runs:
+            run['metrics'] = {row['name']: dict(row) for row in self.db.execute(
+                "SELECT name, count, median_ms, p95_ms FROM metrics WHERE run_id = ? ORDER BY name",
+                (run['id'],))}
+        return runs
+
+def compare(current, baseline, tolerance=0.2, floor_ms=5.0, min_runs=3):
+    """Compare {name: [seconds]} samples with baseline() summaries.
+
+    Returns one row per metric with a status of 'ok', 'regressed' or
+    'no baseline' (fewer than min_runs baseline runs have the metric).
+    """
+    rows = []
+    for name, samples in sorted(current.items()):
+        if not samples:
+            continue
+        stats = summarize(samples)
+        history = [run[name] for run in baseline if name in run]
+        row = {'name': name, 'count': stats['count'], 'baseline_runs': len(history),
+               'status': 'ok', 'regressed': []}
+        for stat in STATS:
+            row[stat] = stats[stat]
+            if len(history) < min_runs:
+                continue
+            values = [run[stat] for run in history]
+            center = statistics.median(values)
+            mad = statistics.median(abs(value - center) for value in values)
+            allowed = center + max(center * tolerance, 3 * 1.4826 * mad, floor_ms)
+            row[f"baseline_{stat}"] = round(center, 3)
+            row[f"allowed_{stat}"] = round(allowed, 3)
+            if stats[stat] > allowed:
+                row['regressed'].append(stat)
+        if len(history) < min_runs:
+            row['status'] = 'no baseline'
+        elif row['regressed']:
+            row['status'] = 'regressed'
+        rows.append(row)
+    return rows
+
+def print_comparison(rows, environment, mode):
+    print(f"📉 Latency vs rolling baseline ({environment}, {mode})")
+    if not rows:
+        print("   no latency samples")
+        return
+    header = (f"   {'metric':<32}{'n':>5}{'median':>10}{'base':>10}{'p95':>10}{'base':>10}"
+              f"{'runs':>6}  status")
+    print(header)
+    for row in rows:
+        cells = ''.join(f"{row[k]:>10.1f}" if row.get(k) is not None else f"{'-':>10}"
+                        for k in ('median_ms', 'baseline_median_ms', 'p95_ms', 'baseline_p95_ms'))
+        status = row['status']
+        if row['regressed']:
+            status = "❌ regressed (" + ', '.join(
+                f"{stat} > {row[f'allowed_{stat}']:.1f}" for stat in row['regressed']) + ")"
+        print(f"   {row['name']:<32}{row['count']:>5}{cells}{row['baseline_runs']:>6}  {status}")
+    print("   (ms)")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="List runs recorded in a latency history file")
+    parser.add_argument("--history", default=DEFAULT_PATH,
+                        help=f"History file (default: {DEFAULT_PATH})")
+    parser.add_argument("--environment", help="Only runs against this environment")
+    parser.add_argument("--mode", help="Only runs of this mode, e.g. checks")
+    parser.add_argument("--limit", type=int, default=20, help="Runs to list (default: 20)")
+    args = parser.parse_args(argv)
+
+    if not os.path.exists(args.history):
+        print(f"No history at {args.history}")
+        return 1
+    history = PerfHistory(args.history)
+    for run in history.recent_runs(args.environment, args.mode, args.limit):
+        print(f"#{run['id']} {run['started_at']} {run['commit_sha']} {run['environment']} "
+              f"{run['mode']} {'passed' if run['passed'] else 'failed'}")
+        for name, stats in run['metrics'].items():
+            print(f"   {name:<32}{stats['count']:>5}  median {stats['median_ms']:.1f}ms  "
+                  f"p95 {stats['p95_ms']:.1f}ms")
+    history.close()
+    return 0
+
+if __name__ == "__main__":
+    exit(main())
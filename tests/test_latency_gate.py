@@ -0,0 +1,61 @@
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+import backend_test
+import perf_history
+
+
+class DelayedHandler(BaseHTTPRequestHandler):
+    delay = 0.0
+
+    def do_GET(self):
+        time.sleep(self.delay)
+        body = b'{}'
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def server():
+    httpd = ThreadingHTTPServer(('127.0.0.1', 0), DelayedHandler)
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{httpd.server_address[1]}"
+    httpd.shutdown()
+    httpd.server_close()
+    DelayedHandler.delay = 0.0
+
+
+def checks_run(base_url, args, delay):
+    """A configuration-check run with an always-failing informational check"""
+    DelayedHandler.delay = delay
+    tester = backend_test.OAuthConfigTester(base_url=base_url)
+    for _ in range(5):
+        tester.http.get(f"{tester.api_base}/users", timeout=10)
+    tester.log_test("Production Settings - Environment Variables Status", False, "informational")
+    return backend_test.checks_gate(args, tester)
+
+
+def test_checks_mode_trips_on_regression(server, tmp_path):
+    history = str(tmp_path / 'history.sqlite')
+    args = backend_test.parse_args(['--base-url', server, '--history', history,
+                                    '--commit', 'test', '--regression-floor-ms', '20'])
+
+    for _ in range(3):
+        assert checks_run(server, args, 0.01)
+    assert not checks_run(server, args, 0.2)
+
+    db = perf_history.PerfHistory(history)
+    try:
+        assert len(db.baseline(args.base_url.split('//')[1], 'checks c=1')) == 3
+    finally:
+        db.close()
@@ -0,0 +1,303 @@
+#!/usr/bin/env python3
+"""
+Synthetic workbook generator for load and aggregation benchmarks
+Streams all seven sheets of GOOGLE_SHEETS_INTEGRATION_GUIDE.md to per-sheet
+CSV or JSONL files that gas_fixtures.load_workbook / iter_sheet can read.
+"""
+
+import argparse
+import csv
+import json
+import os
+import random
+import time
+from datetime import date, timedelta
+from itertools import accumulate
+
+from gas_fixtures import SHEETS
+
+CHUNK_SIZE = 50000
+
+FIRST_NAMES = ['Aarav', 'Ananya', 'Rohan', 'Priya', 'Vikram', 'Neha', 'Arjun', 'Kavya',
+               'Rahul', 'Isha', 'Karan', 'Meera', 'Siddharth', 'Pooja', 'Aditya', 'Sneha',
+               'Pawan', 'Ravi', 'Anjali', 'Deepak']
+LAST_NAMES = ['Sharma', 'Kumar', 'Patel', 'Singh', 'Gupta', 'Mehta', 'Iyer', 'Reddy',
+              'Sankhala', 'Joshi', 'Nair', 'Verma', 'Chopra', 'Rao', 'Das', 'Bose']
+DOMAINS = ['cronberry.com', 'maaruji.com']
+CLIENT_PREFIXES = ['Tech', 'Global', 'Startup', 'Prime', 'Blue', 'Nova', 'Apex', 'Green',
+                   'Smart', 'Urban', 'Metro', 'Bright']
+CLIENT_SUFFIXES = ['Corp', 'Ltd', 'Solutions', 'Labs', 'Systems', 'Retail', 'Foods', 'Works']
+REFUND_REASONS = ['Product not as described', 'Duplicate payment', 'Client churned',
+                  'Billing error', 'Downgraded plan']
+
+# Stage -> (base points, bonus type, bonus points), matching the Rules sheet below
+ACTIVITY_TYPES = {
+    'contact': (20, 'speed', 10),
+    'demo': (50, 'quality', 20),
+    'closure': (400, 'upsell', 100),
+}
+ACTIVITY_MIX = [('contact', 0.6), ('demo', 0.3), ('closure', 0.1)]
+ACTIVITY_LABELS = {'contact': 'Contacted', 'demo': 'Demo Done', 'closure': 'Closure Won'}
+BONUS_RATE = 0.25
+
+RULES = [
+    ('points', 'contact', 20, 'Speed Bonus', 10, 'Contacted within 15 minutes'),
+    ('points', 'demo', 50, 'Quality Bonus', 20, 'Demo rated 4+ by client'),
+    ('points', 'closure', 400, 'Upsell Bonus', 100, 'Closed above list price'),
+]
+
+# Level name, share of the mean points per rep-cycle, commission %, icon, description
+LEVELS = [
+    ('Rookie', 0.0, 0, '🎯', 'Getting started'),
+    ('Hunter', 0.5, 10, '🥉', 'Consistent performer'),
+    ('Striker', 1.0, 20, '🥇', 'Top performer with priority leads'),
+    ('Slayer', 2.0, 30, '👑', 'Elite closer'),
+]
+# Smallest gap between consecutive level thresholds, in points
+LEVEL_STEP = 10
+
+def cycle_ids(end_cycle, count):
+    """The count quarters ending at end_cycle, oldest first: ['2025Q1', '2025Q2', ...]"""
+    year, quarter = int(end_cycle[:4]), int(end_cycle[-1])
+    cycles = []
+    for _ in range(count):
+        cycles.append(f"{year}Q{quarter}")
+        quarter -= 1
+        if quarter == 0:
+            year, quarter = year - 1, 4
+    return cycles[::-1]
+
+def cycle_dates(cycle_id):
+    """All ISO dates in a quarter"""
+    year, quarter = int(cycle_id[:4]), int(cycle_id[-1])
+    start = date(year, 3 * quarter - 2, 1)
+    end = date(year + 1, 1, 1) if quarter == 4 else date(year, 3 * quarter + 1, 1)
+    return [(start + timedelta(days=n)).isoformat() for n in range((end - start).days)]
+
+def zipf_weights(count, skew, rng):
+    """Cumulative Zipf(skew) weights over count reps, in shuffled rank order"""
+    weights = [1.0 / (rank ** skew) for rank in range(1, count + 1)]
+    rng.shuffle(weights)
+    return list(accumulate(weights))
+
+class SheetWriter:
+    """Append rows of one sheet to <out>/<sheet>.csv or .jsonl.
+
+    With plain=True CSV rows are formatted with a fixed '%s,%s,...' template
+    instead of the csv module, which is several times faster. Only use it for
+    rows whose text fields cannot contain commas, quotes or newlines.
+    """
+
+    def __init__(self, out_dir, sheet, fmt, plain=False):
+        self.sheet = sheet
+        self.columns = [name for name, _ in SHEETS[sheet]]
+        self.fmt = fmt
+        self.plain = plain
+        self.line_format = ','.join(['%s'] * len(self.columns)) + '\n'
+        self.rows = 0
+        self.file = open(os.path.join(out_dir, f"{sheet}.{fmt}"), 'w', newline='', encoding='utf-8')
+        if fmt == 'csv':
+            self.writer = csv.writer(self.file)
+            self.writer.writerow(self.columns)
+
+    def write_rows(self, rows):
+        if self.fmt == 'csv' and self.plain:
+            line_format = self.line_format
+            self.file.write(''.join([line_format % row for row in rows]))
+        elif self.fmt == 'csv':
+            self.writer.writerows(rows)
+        else:
+            columns = self.columns
+            self.file.write(''.join([json.dumps(dict(zip(columns, row)), ensure_ascii=False) + '\n'
+                                     for row in rows]))
+        self.rows += len(rows)
+
+    def close(self):
+        self.file.close()
+
+class WorkbookGenerator:
+    """Seedable generator of a realistic, referentially consistent workbook.
+
+    Only the rep roster and small lookup tables live in memory; Sales, Refunds
+    and Activities are produced and written in chunks of CHUNK_SIZE rows, with
+    the random draws for a chunk made in bulk. Refunds are drawn while the
+    sales they reference are generated, so every original_transaction_id
+    exists without keeping the Sales sheet around.
+    """
+
+    def __init__(self, reps=100, cycles=4, end_cycle='2025Q3', sales=10000, activities=100000,
+                 refund_rate=0.03, skew=1.1, seed=None):
+        self.rep_count = reps
+        self.cycles = cycle_ids(end_cycle, cycles)
+        self.sales = sales
+        self.activities = activities
+        self.refund_rate = refund_rate
+        self.skew = skew
+        self.seed = seed
+        self.rng = random.Random(seed)
+        self.rep_ids = [f"r_{100 + n}" for n in range(reps)]
+        self.rep_weights = zipf_weights(reps, skew, self.rng)
+        self.dates = {cycle: cycle_dates(cycle) for cycle in self.cycles}
+        self.cycle_days = [(cycle, day) for cycle in self.cycles for day in self.dates[cycle]]
+        self.clients = [f"{prefix}{other.lower()} {suffix}" for prefix in CLIENT_PREFIXES
+                        for other in CLIENT_PREFIXES for suffix in CLIENT_SUFFIXES]
+
+    def rep_rows(self):
+        rng = self.rng
+        for n, rep_id in enumerate(self.rep_ids):
+            first, last = rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)
+            hire = date(2022, 1, 1) + timedelta(days=rng.randrange(1000))
+            yield (rep_id, f"{first} {last}", f"{first.lower()}.{last.lower()}{n}@{rng.choice(DOMAINS)}",
+                   'active' if rng.random() < 0.95 else 'inactive', hire.isoformat())
+
+    def target_rows(self):
+        rng = self.rng
+        mean_sales = self.sales / max(1, self.rep_count * len(self.cycles)) * 12000
+        n = 0
+        for cycle in self.cycles:
+            dates = self.dates[cycle]
+            for rep_id in self.rep_ids:
+                n += 1
+                target = int(max(50000, round(mean_sales * rng.uniform(0.8, 1.6), -3)))
+                yield (f"TGT_{n:07d}", rep_id, cycle, target, dates[0], dates[-1])
+
+    def level_rows(self):
+        """Levels with thresholds scaled to the generated activity volume"""
+        per_type = sum(share * (base + BONUS_RATE * bonus)
+                       for (name, share), (base, _, bonus)
+                       in zip(ACTIVITY_MIX, ACTIVITY_TYPES.values()))
+        mean_points = self.activities * per_type / max(1, self.rep_count * len(self.cycles))
+        thresholds = []
+        for _, share, _, _, _ in LEVELS:
+            # Low volumes round several shares to the same value; keep every
+            # threshold at least LEVEL_STEP above the previous one
+            scaled = int(round(mean_points * share, -1))
+            thresholds.append(max(scaled, thresholds[-1] + LEVEL_STEP) if thresholds else scaled)
+        for i, (name, _, commission, icon, description) in enumerate(LEVELS):
+            upper = thresholds[i + 1] - 1 if i + 1 < len(LEVELS) else 999999999
+            yield (name, thresholds[i], upper, commission, icon, description)
+
+    def _pick(self, count):
+        """Draw rep ids (Zipf-skewed) and (cycle_id, date) pairs for a chunk of rows"""
+        rng = self.rng
+        reps = rng.choices(self.rep_ids, cum_weights=self.rep_weights, k=count)
+        days = rng.choices(self.cycle_days, k=count)
+        return reps, days
+
+    def sales_chunks(self):
+        """Yield (sales_rows, refund_rows) chunks"""
+        rng = self.rng
+        written = 0
+        refund_n = 0
+        while written < self.sales:
+            count = min(CHUNK_SIZE, self.sales - written)
+            reps, days = self._pick(count)
+            clients = rng.choices(self.clients, k=count)
+            sales, refunds = [], []
+            for rep, (cycle, day), client in zip(reps, days, clients):
+                written += 1
+                transaction_id = f"TXN_{written:09d}"
+                amount = int(round(rng.lognormvariate(9.2, 0.6), -2)) or 500
+                confirmed = rng.random() < 0.95
+                sales.append((transaction_id, rep, client, amount, day, f"L{written:09d}", cycle,
+                              'confirmed' if confirmed else 'pending'))
+                if confirmed and rng.random() < self.refund_rate:
+                    refund_n += 1
+                    refund_day = (date.fromisoformat(day) + timedelta(days=rng.randrange(21))).isoformat()
+                    refunds.append((f"REF_{refund_n:08d}", rep, transaction_id, client,
+                                    int(amount * rng.choice((0.25, 0.5, 1.0))),
+                                    min(refund_day, self.dates[cycle][-1]),
+                                    rng.choice(REFUND_REASONS), cycle))
+            yield sales, refunds
+
+    def activity_chunks(self):
+        rng = self.rng
+        # Every (type, bonus) combination with its probability, drawn in one pass
+        variants, weights = [], []
+        for kind, share in ACTIVITY_MIX:
+            base, bonus_type, bonus = ACTIVITY_TYPES[kind]
+            label = ACTIVITY_LABELS[kind]
+            variants.append((kind, base, 'none', label))
+            weights.append(share * (1 - BONUS_RATE))
+            variants.append((kind, base + bonus, bonus_type, label))
+            weights.append(share * BONUS_RATE)
+        weights = list(accumulate(weights))
+        leads = range(1, 10 * max(1, self.sales))
+        written = 0
+        while written < self.activities:
+            count = min(CHUNK_SIZE, self.activities - written)
+            reps, days = self._pick(count)
+            kinds = rng.choices(variants, cum_weights=weights, k=count)
+            lead_ids = rng.choices(leads, k=count)
+            rows = [(f"ACT_{n:010d}", rep, f"L{lead:09d}", kind, points, day,
+                     f"{label} (Lead #L{lead:09d})", bonus_type, cycle)
+                    for n, rep, (cycle, day), (kind, points, bonus_type, label), lead
+                    in zip(range(written + 1, written + count + 1), reps, days, kinds, lead_ids)]
+            written += count
+            yield rows
+
+    def write(self, out_dir, fmt='csv'):
+        """Write every sheet to out_dir and return the row count per sheet"""
+        os.makedirs(out_dir, exist_ok=True)
+        # Generated text comes from fixed word lists, so the bulk sheets are safe to write plain
+        bulk = ('Sales', 'Refunds', 'Activities')
+        writers = {sheet: SheetWriter(out_dir, sheet, fmt, plain=sheet in bulk) for sheet in SHEETS}
+        try:
+            writers['Reps'].write_rows(list(self.rep_rows()))
+            writers['Targets'].write_rows(list(self.target_rows()))
+            writers['Rules'].write_rows(RULES)
+            writers['Levels'].write_rows(list(self.level_rows()))
+            for sales, refunds in self.sales_chunks():
+                writers['Sales'].write_rows(sales)
+                writers['Refunds'].write_rows(refunds)
+            for rows in self.activity_chunks():
+                writers['Activities'].write_rows(rows)
+        finally:
+            for writer in writers.values():
+                writer.close()
+
+        counts = {sheet: writer.rows for sheet, writer in writers.items()}
+        manifest = {
+            'seed': self.seed,
+            'reps': self.rep_count,
+            'cycles': self.cycles,
+            'refund_rate': self.refund_rate,
+            'skew': self.skew,
+            'format': fmt,
+            'rows': counts,
+        }
+        with open(os.path.join(out_dir, 'manifest.json'), 'w') as f:
+            json.dump(manifest, f, indent=2)
+        return counts
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generate a synthetic dashboard workbook")
+    parser.add_argument("out", help="Output directory (one file per sheet)")
+    parser.add_argument("--reps", type=int, default=100)
+    parser.add_argument("--cycles", type=int, default=4, help="Number of quarters (default: 4)")
+    parser.add_argument("--end-cycle", default="2025Q3", help="Last quarter, YYYYQX (default: 2025Q3)")
+    parser.add_argument("--sales", type=int, default=10000, help="Sales rows (default: 10000)")
+    parser.add_argument("--activities", type=int, default=100000,
+                        help="Activities rows (default: 100000)")
+    parser.add_argument("--refund-rate", type=float, default=0.03,
+                        help="Share of confirmed sales refunded (default: 0.03)")
+    parser.add_argument("--skew", type=float, default=1.1,
+                        help="Zipf exponent of per-rep volume (default: 1.1)")
+    parser.add_argument("--seed", type=int, help="RNG seed for reproducible output")
+    parser.add_argument("--format", choices=['csv', 'jsonl'], default='csv')
+    args = parser.parse_args(argv)
+
+    generator = WorkbookGenerator(reps=args.reps, cycles=args.cycles, end_cycle=args.end_cycle,
+                                  sales=args.sales, activities=args.activities,
+                                  refund_rate=args.refund_rate, skew=args.skew, seed=args.seed)
+    start_time = time.time()
+    counts = generator.write(args.out, args.format)
+    elapsed = time.time() - start_time
+    total = sum(counts.values())
+    for sheet, rows in counts.items():
+        print(f"{sheet:<12}{rows:>12,}")
+    print(f"Wrote {total:,} rows to {args.out} in {elapsed:.1f}s "
+          f"({total / elapsed / 1e6 if elapsed else 0:.2f}M rows/s)")
+
+if __name__ == "__main__":
+    main()